@@ -0,0 +1,62 @@
+"""Memory report: bytes per row of the cleaned frames, before and after the schema.
+
+Reads the local data store, so run the app (or `python -m utilities.ingest`)
+once first. Run from the repository root:
+
+    python -m benchmarks.bench_memory --team NSH
+"""
+
+import argparse
+
+import pandas as pd
+
+from core.cleaning import (
+    build_team_perspective_df,
+    merge_player_info,
+    select_team_faceoffs,
+)
+from utilities.schema import memory_per_row
+from utilities.store import STORE_DIR, read_store
+
+
+def widen(df: pd.DataFrame) -> pd.DataFrame:
+    """The frame with the default pandas dtypes it had before the schema."""
+    dtypes = {}
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtypes[col] = object
+        elif dtype.kind == "i":
+            dtypes[col] = "int64"
+        elif dtype.kind == "f":
+            dtypes[col] = "float64"
+    return df.astype(dtypes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--team", default="NSH")
+    args = parser.parse_args()
+
+    faceoffs_df, player_df = read_store(args.store)
+    league_df = build_team_perspective_df(faceoffs_df)
+    team_df = merge_player_info(select_team_faceoffs(league_df, args.team), player_df)
+
+    frames = [
+        ("players", player_df),
+        ("league faceoffs", league_df),
+        (f"{args.team} faceoffs", team_df),
+    ]
+
+    print(f"{'frame':<20}{'rows':>10}{'before':>12}{'after':>12}{'saved':>10}")
+    for label, df in frames:
+        before, after = memory_per_row(widen(df)), memory_per_row(df)
+        print(
+            f"{label:<20}{len(df):>10,}{before:>12,.1f}{after:>12,.1f}"
+            f"{1 - after / before:>10.0%}"
+        )
+    print("(bytes per row)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Micro-benchmark: per-row clock/height parsers vs. their vectorized versions.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parsing --rows 1000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utilities.general import (
+    height_to_inches,
+    series_height_to_inches,
+    series_MMSS_to_seconds,
+    transform_MMSS_to_seconds,
+)
+
+
+def make_clock_series(rows: int, rng: np.random.Generator) -> pd.Series:
+    seconds = rng.integers(0, 20 * 60, rows)
+    return pd.Series(
+        [f"{s // 60:02d}:{s % 60:02d}" for s in seconds], dtype=object, name="clock"
+    )
+
+
+def make_height_series(rows: int, rng: np.random.Generator) -> pd.Series:
+    heights = [
+        f"{f}'{i}" for f, i in zip(rng.integers(5, 7, rows), rng.integers(0, 12, rows))
+    ]
+    series = pd.Series(heights, dtype=object, name="height")
+    # Sprinkle in the missing / malformed values seen in the player sheet
+    series[rng.random(rows) < 0.02] = None
+    return series
+
+
+def time_call(func, series: pd.Series, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(series)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    clocks = make_clock_series(args.rows, rng)
+    heights = make_height_series(args.rows, rng)
+
+    cases = [
+        ("clock  per-row", lambda s: s.apply(transform_MMSS_to_seconds), clocks),
+        ("clock  vectorized", series_MMSS_to_seconds, clocks),
+        ("height per-row", lambda s: s.apply(height_to_inches), heights),
+        ("height vectorized", series_height_to_inches, heights),
+    ]
+
+    print(f"{'parser':<20}{'seconds':>10}{'rows/sec':>16}")
+    for label, func, series in cases:
+        elapsed = time_call(func, series, args.repeat)
+        print(f"{label:<20}{elapsed:>10.3f}{len(series) / elapsed:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Stage benchmark: time (and optionally memory-profile) the app's data path.
+
+Generates synthetic data at each scale (see `benchmarks.synthetic`) and runs
+it through every stage the app runs, from ingest to the rink chart
+aggregation. Run from the repository root:
+
+    python -m benchmarks.bench_stages --scales 1 10 100
+    python -m benchmarks.bench_stages --scales 1000 --memory --skip-model
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+from core.aggregates import (
+    calculate_team_aggregate_win_rates,
+    league_faceoff_rates,
+    player_win_rates,
+    team_codes_df,
+)
+from core.cleaning import (
+    build_team_perspective_df,
+    faceoff_league_cleaning,
+    merge_player_info,
+    player_cleaning,
+    read_team_codes,
+    select_team_faceoffs,
+)
+from core.features import MODEL_FEATURES, build_feature_matrix, situation_input_df
+from core.filters import build_filter_masks, filter_faceoff_df
+from core.model import (
+    BOOSTED_PARAMS,
+    DEFAULT_PARAMS,
+    predict_faceoff_winners,
+    refresh_faceoff_model,
+    train_faceoff_model,
+)
+from utilities.ingest import ingest_sheets
+from utilities.plots import RINK_BIN_SIZE, build_rink_summaries
+from utilities.store import read_store
+
+from benchmarks.synthetic import generate_dataset
+
+# A typical selection: home faceoffs outside the neutral zone, at even strength
+BENCH_FILTERS = {
+    "home_filter": "Home",
+    "zone_filter": ["offense", "defense"],
+    "strength_filter": "Even Strength",
+}
+
+BENCH_SITUATION = {
+    "home": True,
+    "players_diff": 0,
+    "seconds_elapsed__game": 2400,
+    "zone__offense": True,
+    "zone__defense": False,
+    "score_team": 2,
+    "score_diff": 0,
+}
+
+
+def run_stage(func, memory: bool):
+    """Call `func`, returning its result, the seconds taken and peak MB."""
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def bench_scale(scale: float, team: str, memory: bool, skip_model: bool) -> list:
+    """(stage, seconds, peak MB, rows out) for every stage at one scale."""
+    rows = []
+
+    def stage(name, func, n_rows=len):
+        result, seconds, peak = run_stage(func, memory)
+        rows.append((name, seconds, peak, n_rows(result)))
+        return result
+
+    faceoffs_raw, players_raw = stage(
+        "generate", lambda: generate_dataset(scale), lambda r: len(r[0])
+    )
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        stage("faceoff_league_cleaning", lambda: faceoff_league_cleaning(faceoffs_raw))
+        stage(
+            "ingest_sheets",
+            lambda: ingest_sheets(faceoffs_raw, players_raw, store_dir),
+            lambda r: len(faceoffs_raw),
+        )
+        faceoffs_df, player_df = stage(
+            "load_data", lambda: read_store(store_dir), lambda r: len(r[0])
+        )
+
+    # faceoff_cleaning: the league is turned once, then sliced per team
+    league_df = stage(
+        "build_team_perspective_df", lambda: build_team_perspective_df(faceoffs_df)
+    )
+    team_df = stage(
+        "select_team_faceoffs", lambda: select_team_faceoffs(league_df, team)
+    )
+    stage("player_cleaning", lambda: player_cleaning(players_raw.copy()))
+    team_df = stage("merge_player_info", lambda: merge_player_info(team_df, player_df))
+
+    masks = stage(
+        "build_filter_masks", lambda: build_filter_masks(team_df), lambda r: len(r)
+    )
+    stage("filter_faceoff_df", lambda: filter_faceoff_df(team_df, BENCH_FILTERS, masks))
+
+    team_win_rates = stage(
+        "team_win_rates",
+        lambda: calculate_team_aggregate_win_rates(
+            league_faceoff_rates(faceoffs_df), team_codes_df(read_team_codes())
+        ),
+    )
+    X, y, games = stage(
+        "build_feature_matrix",
+        lambda: build_feature_matrix(team_df, team_win_rates, MODEL_FEATURES),
+        lambda r: len(r[0]),
+    )
+
+    if not skip_model:
+        trained = stage(
+            "model fit",
+            lambda: train_faceoff_model(X, y, DEFAULT_PARAMS),
+            lambda r: len(X),
+        )
+        stage(
+            "model fit (xgboost)",
+            lambda: train_faceoff_model(X, y, BOOSTED_PARAMS),
+            lambda r: len(X),
+        )
+
+        # An in-season refresh: the team's last game added to a model of the
+        # rest, including a full retrain if the update is rejected
+        last_game = games == games.max()
+        base = train_faceoff_model(
+            X[~last_game], y[~last_game], DEFAULT_PARAMS, games[~last_game]
+        )
+        stage(
+            "model refresh (last game)",
+            lambda: refresh_faceoff_model(base, X, y, DEFAULT_PARAMS, games),
+            lambda r: int(last_game.sum()),
+        )
+        opponent_win_pct = team_win_rates["win_rate"].mean()
+        stage(
+            "model predict",
+            lambda: predict_faceoff_winners(
+                trained["model"],
+                *situation_input_df(
+                    BENCH_SITUATION,
+                    player_win_rates(team_df),
+                    opponent_win_pct,
+                    MODEL_FEATURES,
+                ),
+            ),
+        )
+
+    stage("rink aggregation", lambda: build_rink_summaries(team_df)[1])
+    stage(
+        "rink aggregation (binned)",
+        lambda: build_rink_summaries(team_df, bin_size=RINK_BIN_SIZE)[1],
+    )
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10])
+    parser.add_argument("--team", default="NSH")
+    parser.add_argument(
+        "--memory", action="store_true", help="Record peak memory (slower)"
+    )
+    parser.add_argument("--skip-model", action="store_true")
+    args = parser.parse_args()
+
+    for scale in args.scales:
+        print(f"\nScale {scale:g}x")
+        print(f"{'stage':<28}{'seconds':>10}{'peak MB':>10}{'rows':>12}")
+        for name, seconds, peak, n_rows in bench_scale(
+            scale, args.team, args.memory, args.skip_model
+        ):
+            peak = "-" if peak is None else f"{peak:,.0f}"
+            print(f"{name:<28}{seconds:>10.3f}{peak:>10}{n_rows:>12,}")
+
+
+if __name__ == "__main__":
+    main()
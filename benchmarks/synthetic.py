@@ -0,0 +1,271 @@
+"""Synthetic faceoff workbooks in the sample workbook's schema, at any scale.
+
+1x is 200 games (about 12,000 faceoffs); 10x, 100x and 1000x scale the number
+of games, filling whole 1,312 game seasons before starting the next one.
+Run from the repository root:
+
+    python -m benchmarks.synthetic --scale 10 --out data/synthetic
+    python -m benchmarks.synthetic --scale 1000 --format parquet
+
+Excel workbooks are split by season so none exceeds Excel's row limit. The
+synthetic games and player ids overlap the sample's, so ingest them into a
+store of their own:
+
+    python -m utilities.ingest data/synthetic/*.xlsx --store data/synthetic/store
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.cleaning import TEAMCODES_PATH
+
+GAMES_PER_SCALE = 200
+GAMES_PER_SEASON = 1312
+FACEOFFS_PER_GAME = 60
+PLAYERS_PER_TEAM = 26
+FIRST_PLAYER_ID = 8470000
+EXCEL_MAX_ROWS = 1_048_575
+
+# Faceoff dots (x, y); x > 0 is the end the home team attacks in periods 1 & 3
+CENTER_DOT = (0, 0)
+NEUTRAL_DOTS = [(-20, -22), (-20, 22), (20, -22), (20, 22)]
+END_DOTS = [(-69, -22), (-69, 22), (69, -22), (69, 22)]
+
+# HomeStrength, its share of faceoffs in the sample workbook and HomeStrengthID
+STRENGTHS = {
+    "EV": (0.718, 55),
+    "PP": (0.103, 54),
+    "SH": (0.087, 45),
+    "PP EN": (0.022, 55),
+    "SH EA": (0.017, 55),
+    "EN": (0.016, 55),
+    "EA": (0.015, 55),
+    "PP EA": (0.012, 55),
+    "SH EN": (0.010, 55),
+}
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1 / (1 + np.exp(-x))
+
+
+def _clock(seconds: np.ndarray) -> np.ndarray:
+    # MM:SS strings, as in the TimeRemaining & TimeElapsed columns
+    return np.char.add(
+        np.char.add(np.char.zfill((seconds // 60).astype(str), 2), ":"),
+        np.char.zfill((seconds % 60).astype(str), 2),
+    )
+
+
+def generate_players(
+    team_names: list[str], rng: np.random.Generator
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """The PlayerInfo sheet, plus each player's hidden faceoff skill."""
+    n_players = len(team_names) * PLAYERS_PER_TEAM
+    inches = rng.normal(73, 2, n_players).round().astype(int)
+    height = np.char.add(
+        np.char.add((inches // 12).astype(str), "'"), (inches % 12).astype(str)
+    ).astype(object)
+    height[rng.random(n_players) < 0.05] = None
+    weight = (150 + (inches - 60) * 4 + rng.normal(0, 10, n_players)).round()
+    weight[rng.random(n_players) < 0.05] = np.nan
+    shoots = rng.choice(["L", "R"], n_players, p=[0.62, 0.38]).astype(object)
+    shoots[rng.random(n_players) < 0.03] = None
+
+    players_df = pd.DataFrame(
+        {
+            "PlayerID": FIRST_PLAYER_ID + np.arange(n_players),
+            "Height": height,
+            "Weight": weight,
+            "Shoots": shoots,
+            "Nationality": rng.choice(
+                ["CAN", "USA", "SWE", "FIN", "RUS", "CZE"], n_players
+            ),
+        }
+    )
+    return players_df, rng.normal(0, 0.3, n_players)
+
+
+def generate_faceoffs(
+    n_games: int,
+    team_names: list[str],
+    skill: np.ndarray,
+    rng: np.random.Generator,
+    first_game: int = 0,
+    last_season: int = 2023,
+) -> pd.DataFrame:
+    """The NHLFaceOffs sheet for games `first_game` to `first_game + n_games`."""
+    n_teams = len(team_names)
+
+    ## ----- ##
+    ## GAMES ##
+    ## ----- ##
+
+    game = first_game + np.arange(n_games)
+    total_seasons = (first_game + n_games - 1) // GAMES_PER_SEASON + 1
+    season_start = last_season - total_seasons + 1 + game // GAMES_PER_SEASON
+    game_number = game % GAMES_PER_SEASON + 1
+    home_team = rng.integers(0, n_teams, n_games)
+    away_team = (home_team + rng.integers(1, n_teams, n_games)) % n_teams
+    overtime_game = rng.random(n_games) < 0.22
+
+    # One row per faceoff, in game order
+    faceoffs = rng.poisson(FACEOFFS_PER_GAME, n_games).clip(30, None)
+    row_game = np.repeat(np.arange(n_games), faceoffs)
+    n = len(row_game)
+    game_start = np.repeat(np.cumsum(faceoffs) - faceoffs, faceoffs)
+    position = (np.arange(n) - game_start + rng.random(n)) / faceoffs[row_game]
+
+    ## ------------- ##
+    ## PERIOD & TIME ##
+    ## ------------- ##
+
+    # Overtime games spend their last 7% of faceoffs in a 5 minute overtime
+    ot_row = overtime_game[row_game]
+    regulation = np.where(ot_row, np.minimum(position / 0.93, 1 - 1e-9), position)
+    in_ot = ot_row & (position >= 0.93)
+    period = np.where(in_ot, 4, 1 + (regulation * 3).astype(int))
+    period_length = np.where(in_ot, 300, 1200)
+    fraction = np.where(in_ot, (position - 0.93) / 0.07, regulation * 3 % 1)
+    elapsed = (fraction * period_length).astype(int)
+
+    ## ----- ##
+    ## SCORE ##
+    ## ----- ##
+
+    # Goals between faceoffs; the score is the running total within the game
+    goal = (rng.random(n) < 0.09) & (np.arange(n) != game_start)
+    home_goal = goal & (rng.random(n) < 0.53)
+    away_goal = goal & ~home_goal
+    home_score = np.cumsum(home_goal) - np.cumsum(home_goal)[game_start]
+    away_score = np.cumsum(away_goal) - np.cumsum(away_goal)[game_start]
+
+    ## -------- ##
+    ## STRENGTH ##
+    ## -------- ##
+
+    shares = np.array([share for share, _ in STRENGTHS.values()])
+    strength_code = rng.choice(len(STRENGTHS), n, p=shares / shares.sum())
+    strength = np.array(list(STRENGTHS), dtype=object)[strength_code]
+    strength_id = np.array([id_ for _, id_ in STRENGTHS.values()])[strength_code]
+
+    ## -------- ##
+    ## LOCATION ##
+    ## -------- ##
+
+    # Faceoffs after a goal & to start a period are at center ice
+    dots = np.array([CENTER_DOT] + NEUTRAL_DOTS + END_DOTS)
+    dot = rng.choice(len(dots), n, p=[0.2] + [0.05] * 4 + [0.15] * 4)
+    dot[goal | (fraction < 0.01)] = 0
+    x, y = dots[dot, 0], dots[dot, 1]
+
+    # Home attacks x > 0 in periods 1 & 3 (and overtime) and x < 0 in period 2
+    attacking = np.where(period == 2, -x, x)
+    home_zone = np.where(
+        np.abs(x) < 69, "Neu", np.where(attacking > 0, "Off", "Def")
+    ).astype(object)
+    away_zone = np.where(
+        home_zone == "Off", "Def", np.where(home_zone == "Def", "Off", "Neu")
+    ).astype(object)
+
+    ## ------- ##
+    ## PLAYERS ##
+    ## ------- ##
+
+    # Four centers take most faceoffs; anyone on the roster can step in
+    def center(team):
+        slot = rng.choice(
+            PLAYERS_PER_TEAM, len(team), p=[0.35, 0.3, 0.2, 0.1] + [0.05 / 22] * 22
+        )
+        return FIRST_PLAYER_ID + team * PLAYERS_PER_TEAM + slot
+
+    home_player = center(home_team[row_game])
+    away_player = center(away_team[row_game])
+    zone_edge = np.where(home_zone == "Off", 0.1, np.where(home_zone == "Def", -0.1, 0))
+    home_wins = rng.random(n) < _sigmoid(
+        skill[home_player - FIRST_PLAYER_ID]
+        - skill[away_player - FIRST_PLAYER_ID]
+        + 0.05
+        + zone_edge
+    )
+
+    names = np.array(team_names, dtype=object)
+    home_name, away_name = names[home_team[row_game]], names[away_team[row_game]]
+    period_label = period.astype(object)
+    period_label[period == 4] = "OT"
+    season = season_start[row_game]
+
+    return pd.DataFrame(
+        {
+            "League": "NHL",
+            "Season": np.char.add(
+                np.char.add(season.astype(str), "-"), (season + 1).astype(str)
+            ),
+            "GameNumber": game_number[row_game],
+            "Period": period_label,
+            "TimeRemaining": _clock(period_length - elapsed),
+            "TimeElapsed": _clock(elapsed),
+            "HomeTeam": home_name,
+            "AwayTeam": away_name,
+            "HomeStrengthID": strength_id,
+            "HomeStrength": strength,
+            "HomeZone": home_zone,
+            "AwayZone": away_zone,
+            "HomeScore": home_score,
+            "AwayScore": away_score,
+            "FOWinTeam": np.where(home_wins, home_name, away_name),
+            "FOWinner": np.where(home_wins, home_player, away_player),
+            "FOLoser": np.where(home_wins, away_player, home_player),
+            "x": x,
+            "y": y,
+        }
+    )
+
+
+def generate_dataset(
+    scale: float, seed: int = 42, teamcodes_path: str = TEAMCODES_PATH
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Synthetic (faceoffs, players) sheets at `scale` times the sample size."""
+    rng = np.random.default_rng(seed)
+    team_names = pd.read_csv(teamcodes_path)["TeamName"].tolist()
+    players_df, skill = generate_players(team_names, rng)
+    faceoffs_df = generate_faceoffs(
+        int(GAMES_PER_SCALE * scale), team_names, skill, rng
+    )
+    return faceoffs_df, players_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="data/synthetic")
+    parser.add_argument("--format", choices=["xlsx", "parquet"], default="xlsx")
+    args = parser.parse_args()
+
+    faceoffs_df, players_df = generate_dataset(args.scale, seed=args.seed)
+    os.makedirs(args.out, exist_ok=True)
+
+    if args.format == "parquet":
+        faceoffs_df.to_parquet(os.path.join(args.out, "faceoffs.parquet"), index=False)
+        players_df.to_parquet(os.path.join(args.out, "players.parquet"), index=False)
+        print(f"Wrote {len(faceoffs_df):,} faceoffs to {args.out}")
+        return
+
+    # One workbook per season, each under Excel's row limit
+    for season, season_df in faceoffs_df.groupby("Season", sort=True):
+        for part, start in enumerate(range(0, len(season_df), EXCEL_MAX_ROWS)):
+            path = os.path.join(args.out, f"faceoffs_{season}_{part + 1}.xlsx")
+            with pd.ExcelWriter(path) as writer:
+                season_df.iloc[start : start + EXCEL_MAX_ROWS].to_excel(
+                    writer, sheet_name="NHLFaceOffs", index=False
+                )
+                players_df.to_excel(writer, sheet_name="PlayerInfo", index=False)
+            print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
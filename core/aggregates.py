@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+SPLIT_COLUMNS = [
+    "zone",
+    "shoots_opponent",
+    "power_play",
+    "short_handed",
+    "empty_net",
+    "extra_attacker",
+    "home",
+]
+
+
+# Splits teams & faceoff takers are ranked by on the league leaderboard
+LEADERBOARD_SPLITS = ["zone", "strength", "score_state"]
+
+
+def _roll_up_splits(
+    cube: pd.DataFrame, keys: list[str], split_columns: list[str]
+) -> pd.DataFrame:
+    """Roll a faceoff/win count cube up to every split of `split_columns`.
+
+    Returns a table indexed by `keys` plus (split, value), where the "overall"
+    split holds the totals of each key.
+    """
+
+    def with_split(split_df, split, values):
+        split_df.index = pd.MultiIndex.from_arrays(
+            [split_df.index.get_level_values(key) for key in keys]
+            + [[split] * len(split_df), values]
+        )
+        return split_df
+
+    totals = cube.groupby(keys, observed=True)[["faceoffs", "wins"]].sum()
+    splits = [with_split(totals, "overall", ["all"] * len(totals))]
+    for col in split_columns:
+        split = cube.groupby(keys + [col], observed=True)[["faceoffs", "wins"]].sum()
+        splits.append(with_split(split, col, split.index.get_level_values(col)))
+
+    splits = pd.concat(splits).sort_index(
+        level=list(range(len(keys))), sort_remaining=False, kind="stable"
+    )
+    splits.index.names = keys + ["split", "value"]
+    splits["win_rate"] = splits["wins"] / splits["faceoffs"]
+
+    return splits
+
+
+def build_player_splits(df: pd.DataFrame) -> pd.DataFrame:
+    """Faceoffs and wins for every player in every split, from one grouped pass.
+
+    Returns a table indexed by (playerid_team, split, value), where the
+    "overall" split holds each player's totals.
+    """
+    cube = (
+        df.groupby(["playerid_team"] + SPLIT_COLUMNS, dropna=False, observed=True)
+        .agg(faceoffs=("gameID", "count"), wins=("win", "sum"))
+        .reset_index()
+    )
+    return _roll_up_splits(cube, ["playerid_team"], SPLIT_COLUMNS)
+
+
+def build_leaderboards(league_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Every team's and faceoff taker's record, from one league-wide grouped pass.
+
+    Takes the league perspective table. Returns the team table, indexed by
+    (team, split, value), and the player table, indexed by (team,
+    playerid_team, split, value), over the LEADERBOARD_SPLITS; the "overall"
+    split holds the totals.
+    """
+    strength = pd.Series(
+        np.select(
+            [league_df["power_play"] == 1, league_df["short_handed"] == 1],
+            ["power_play", "short_handed"],
+            "even_strength",
+        ),
+        index=league_df.index,
+        name="strength",
+    )
+    cube = (
+        league_df.groupby(
+            [
+                league_df["team"],
+                league_df["playerid_team"],
+                league_df["zone"],
+                strength,
+                league_df["score_state"],
+            ],
+            observed=True,
+        )
+        .agg(faceoffs=("win", "count"), wins=("win", "sum"))
+        .reset_index()
+    )
+
+    teams = _roll_up_splits(cube, ["team"], LEADERBOARD_SPLITS)
+    players = _roll_up_splits(cube, ["team", "playerid_team"], LEADERBOARD_SPLITS)
+
+    return teams, players
+
+
+def league_faceoff_rates(df: pd.DataFrame) -> pd.DataFrame:
+    """Faceoffs taken and won by every team, counted in one pass.
+
+    Home and away appearances are counted with `bincount` on integer team
+    codes, so the league frame is never duplicated.
+    """
+    teamcodes = pd.Index(pd.unique(df[["HomeTeam", "AwayTeam"]].to_numpy().ravel()))
+    teamcodes = teamcodes.dropna().sort_values()
+
+    faceoffs = np.zeros(len(teamcodes), dtype=int)
+    faceoffs_won = np.zeros(len(teamcodes), dtype=int)
+    for col in ["HomeTeam", "AwayTeam"]:
+        codes = teamcodes.get_indexer(df[col])
+        known = codes >= 0
+        won = (df[col] == df["FOWinTeam"]).to_numpy()
+        faceoffs += np.bincount(codes[known], minlength=len(teamcodes))
+        faceoffs_won += np.bincount(codes[known & won], minlength=len(teamcodes))
+
+    faceoff_stats = pd.DataFrame(
+        {
+            "teamcode": teamcodes,
+            "total_faceoffs": faceoffs,
+            "faceoffs_won": faceoffs_won,
+        }
+    )
+
+    # Calculate win rate
+    faceoff_stats["win_rate"] = (
+        faceoff_stats["faceoffs_won"] / faceoff_stats["total_faceoffs"]
+    )
+
+    return faceoff_stats
+
+
+def team_codes_df(teamcodes: dict[str, str]) -> pd.DataFrame:
+    # Create dataframe of team codes
+    teams_df = pd.DataFrame.from_dict(teamcodes, orient="index").reset_index(drop=False)
+    teams_df.columns = ["teamname", "teamcode"]
+    return teams_df
+
+
+def calculate_team_aggregate_win_rates(
+    faceoff_stats: pd.DataFrame, teams_df: pd.DataFrame
+) -> pd.DataFrame:
+    """Join `league_faceoff_rates` output to the teams in `teams_df`."""
+
+    # Join with team names
+    teams_df = faceoff_stats.merge(teams_df, on="teamcode")
+
+    # Reorder columns as desired
+    teams_df = teams_df[
+        ["teamcode", "teamname", "total_faceoffs", "faceoffs_won", "win_rate"]
+    ]
+
+    return teams_df
+
+
+def player_win_rates(faceoff_df: pd.DataFrame) -> pd.DataFrame:
+    """Faceoffs, wins and win rate (to 3 decimals) of every player."""
+    player_agg_df = (
+        faceoff_df.groupby("playerid_team")
+        .agg(faceoffs=("gameID", "count"), wins=("win", "sum"))
+        .reset_index()
+    )
+    player_agg_df["win_pct"] = (
+        player_agg_df["wins"] / player_agg_df["faceoffs"]
+    ).round(3)
+    return player_agg_df
@@ -0,0 +1,318 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from utilities.general import series_MMSS_to_seconds, series_height_to_inches
+from utilities.schema import enforce_schema
+
+TEAMCODES_PATH = "data/nhl_teamcodes.csv"
+
+
+def read_team_codes(path: str = TEAMCODES_PATH) -> dict[str, str]:
+    teamcode_df = pd.read_csv(path).to_dict(orient="records")
+    return {team["TeamName"]: team["TeamCode"] for team in teamcode_df}
+
+
+FACEOFF_COLUMNS = [
+    "gameID",
+    "team",
+    "opponent",
+    "season",
+    "home",
+    "score_team",
+    "score_opponent",
+    "score_diff",
+    "score_state",
+    "players_team",
+    "players_opponent",
+    "players_diff",
+    "power_play",
+    "short_handed",
+    "empty_net",
+    "extra_attacker",
+    "period",
+    "overtime",
+    "seconds_remaining__period",
+    "seconds_remaining__game",
+    "seconds_elapsed__period",
+    "seconds_elapsed__game",
+    "zone",
+    "x",
+    "y",
+    "playerid_team",
+    "playerid_opponent",
+    "winner_team",
+    "winner_playerid",
+    "win",
+]
+
+# Source column for each team/opponent column, from each side's perspective
+PERSPECTIVE_COLUMNS = {
+    "home": {
+        "team": "HomeTeam",
+        "opponent": "AwayTeam",
+        "score_team": "score_home",
+        "score_opponent": "score_away",
+        "players_team": "players_home",
+        "players_opponent": "players_away",
+        "zone": "HomeZone",
+    },
+    "away": {
+        "team": "AwayTeam",
+        "opponent": "HomeTeam",
+        "score_team": "score_away",
+        "score_opponent": "score_home",
+        "players_team": "players_away",
+        "players_opponent": "players_home",
+        "zone": "AwayZone",
+    },
+}
+
+
+# Columns every team perspective shares, plus each side's source columns
+SHARED_COLUMNS = [
+    "gameID",
+    "season",
+    "power_play",
+    "short_handed",
+    "empty_net",
+    "extra_attacker",
+    "period",
+    "overtime",
+    "seconds_remaining__period",
+    "seconds_remaining__game",
+    "seconds_elapsed__period",
+    "seconds_elapsed__game",
+    "x",
+    "y",
+    "FOWinTeam",
+    "FOWinner",
+    "FOLoser",
+]
+
+# Faceoffs missing any of these can't be placed in the game, on the ice or with
+# its players, and the integer columns they become can't hold missing values
+REQUIRED_COLUMNS = {
+    "clock": ["seconds_remaining__period", "seconds_elapsed__period"],
+    "location": ["x", "y"],
+    "winner or loser": ["FOWinner", "FOLoser"],
+}
+
+LEAGUE_COLUMNS = SHARED_COLUMNS + list(
+    dict.fromkeys(
+        list(PERSPECTIVE_COLUMNS["home"].values())
+        + list(PERSPECTIVE_COLUMNS["away"].values())
+    )
+)
+
+
+def _drop_incomplete_faceoffs(df: pd.DataFrame) -> pd.DataFrame:
+    # Dropped with a warning rather than failing the whole sheet (or store)
+    for name, columns in REQUIRED_COLUMNS.items():
+        missing = df[columns].isna().any(axis=1)
+        if missing.any():
+            warnings.warn(f"Dropping {missing.sum():,} faceoffs with a missing {name}")
+            df = df[~missing].reset_index(drop=True)
+    return df
+
+
+def faceoff_league_cleaning(
+    df: pd.DataFrame, teamcodes: dict[str, str] | None = None
+) -> pd.DataFrame:
+    """Team-agnostic cleaning of the raw faceoff sheet, one row per faceoff.
+
+    `teamcodes` maps team names to codes, read from TEAMCODES_PATH if omitted.
+    """
+
+    ## --------------------- ##
+    ## GENERIC DATA CLEANING ##
+    ## --------------------- ##
+
+    # Work on a copy so the cached raw sheet is never modified
+    df = df.copy()
+
+    # Replace Team Names with Team Codes
+    if teamcodes is None:
+        teamcodes = read_team_codes()
+    df["HomeTeam"] = df["HomeTeam"].map(teamcodes)
+    df["AwayTeam"] = df["AwayTeam"].map(teamcodes)
+    df["FOWinTeam"] = df["FOWinTeam"].map(teamcodes)
+
+    # Digitize season & GameNumber
+    df["season"] = df["Season"].str[:4].astype(int)
+    df["gameID"] = df["GameNumber"].astype(int)
+
+    # Digitize period
+    df["overtime"] = (df["Period"] == "OT").astype(int)
+    df["period"] = df["Period"].astype(str).replace("OT", "4").str[0].astype(int)
+
+    # Transform "Time Remaining" and "TimeElapsed" to seconds
+    df["seconds_remaining__period"] = series_MMSS_to_seconds(df["TimeRemaining"])
+    df["seconds_remaining__game"] = np.where(
+        df["overtime"] == 1,
+        df["seconds_remaining__period"],
+        (3 - df["period"]) * 20 * 60 + df["seconds_remaining__period"],
+    )
+    df["seconds_elapsed__period"] = series_MMSS_to_seconds(df["TimeElapsed"])
+    df["seconds_elapsed__game"] = (df["period"] - 1) * 20 * 60 + df[
+        "seconds_elapsed__period"
+    ]
+
+    # Unreadable clocks, and missing locations & players
+    df = _drop_incomplete_faceoffs(df)
+
+    # Extract strength info
+    df["players_home"] = df["HomeStrengthID"].astype(str).str[0].astype(int)
+    df["players_away"] = df["HomeStrengthID"].astype(str).str[1].astype(int)
+
+    df["power_play"] = df["HomeStrength"].isin(["PP EN", "PP EA", "PP"]).astype(int)
+    df["short_handed"] = df["HomeStrength"].isin(["SH EN", "SH EA", "SH"]).astype(int)
+    df["empty_net"] = df["HomeStrength"].isin(["SH EN", "PP EN", "EN"]).astype(int)
+    df["extra_attacker"] = df["HomeStrength"].isin(["SH EA", "PP EA", "EA"]).astype(int)
+
+    df.drop(columns="League", inplace=True)
+
+    # Decode Zones
+    df["HomeZone"] = df["HomeZone"].replace(
+        {"Def": "defense", "Off": "offense", "Neu": "neutral"}
+    )
+    df["AwayZone"] = df["AwayZone"].replace(
+        {"Def": "defense", "Off": "offense", "Neu": "neutral"}
+    )
+
+    # Scores
+    df["score_home"] = df["HomeScore"].astype(int)
+    df["score_away"] = df["AwayScore"].astype(int)
+
+    return df[LEAGUE_COLUMNS]
+
+
+def build_team_perspective_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Build the league-wide faceoff table from every team's perspective.
+
+    Takes the output of `faceoff_league_cleaning`. Each faceoff appears
+    twice, once for the home team and once for the away team. Rows are sorted
+    by team (keeping the sheet order within a team) and indexed by team code,
+    so a single team is a slice rather than a recompute.
+    """
+    # Stores written before incomplete faceoffs were dropped may still hold some
+    df = _drop_incomplete_faceoffs(df)
+
+    ## ---------------------------------- ##
+    ## STACK HOME & AWAY TEAM PERSPECTIVE ##
+    ## ---------------------------------- ##
+
+    perspectives = []
+    for side, columns in PERSPECTIVE_COLUMNS.items():
+        side_df = df[SHARED_COLUMNS + list(columns.values())].rename(
+            columns={source: target for target, source in columns.items()}
+        )
+        side_df["home"] = int(side == "home")
+        side_df["row_number"] = np.arange(len(df))
+        perspectives.append(side_df)
+
+    df = pd.concat(perspectives, ignore_index=True)
+    df = df[df["team"].notna()]
+
+    # Score & players on ice differences
+    df["score_diff"] = df["score_team"] - df["score_opponent"]
+    df["players_diff"] = df["players_team"] - df["players_opponent"]
+
+    # Score State
+    df["score_state"] = np.where(
+        df["score_diff"] > 0,
+        "leading",
+        np.where(df["score_diff"] < 0, "trailing", "tied"),
+    )
+
+    # Winner / Loser perspective
+    df["playerid_team"] = np.where(
+        df["FOWinTeam"] == df["team"], df["FOWinner"], df["FOLoser"]
+    )
+    df["playerid_opponent"] = np.where(
+        df["FOWinTeam"] == df["opponent"], df["FOWinner"], df["FOLoser"]
+    )
+    df["winner_team"] = df["FOWinTeam"]
+    df["winner_playerid"] = df["FOWinner"]
+    df["win"] = (df["team"] == df["winner_team"]).astype(int)
+
+    # Sort & index by team for slicing, the index sharing the team column's
+    # categories rather than holding a string per row
+    df = enforce_schema(df.sort_values(["team", "row_number"])[FACEOFF_COLUMNS])
+    df.index = pd.CategoricalIndex(df["team"]).rename(None)
+
+    return df
+
+
+def select_team_faceoffs(league_df: pd.DataFrame, team: str) -> pd.DataFrame:
+    """Slice one team's faceoffs out of the league perspective table."""
+    return league_df.loc[team:team].reset_index(drop=True)
+
+
+def faceoff_cleaning(df: pd.DataFrame, team_of_interest: str) -> pd.DataFrame:
+    league_df = build_team_perspective_df(faceoff_league_cleaning(df))
+    return select_team_faceoffs(league_df, team_of_interest)
+
+
+def player_cleaning(df: pd.DataFrame) -> pd.DataFrame:
+
+    # Transform height to inches, and fill missing with median
+    df["height"] = series_height_to_inches(df["Height"])
+    df["height"] = df["height"].fillna(df["height"].median())
+
+    # Fill missing weight with median
+    df["weight"] = df["Weight"].fillna(df["Weight"].median())
+
+    # Fill missing shooting hand with mode (most common)
+    df["shoots"] = df["Shoots"].fillna(df["Shoots"].mode()[0])
+
+    # Drop original columns
+    df.drop(columns=["Height", "Weight", "Shoots", "Nationality"], inplace=True)
+
+    df.columns = map(str.lower, df.columns)
+
+    return enforce_schema(df)
+
+
+def merge_player_info(
+    faceoff_df: pd.DataFrame, player_df: pd.DataFrame
+) -> pd.DataFrame:
+    """Map both players' info into the faceoff data.
+
+    Only faceoffs where both players are known are kept. Heights and weights
+    are reduced to team-minus-opponent differences; handedness is kept for
+    both players. Attributes are gathered by position from the player table,
+    so the cost grows with the attributes added, not the faceoff columns, and
+    the faceoff order & index are kept (the league table can be merged once).
+    """
+    attributes = player_df.set_index("playerid")
+
+    # Position of each player in the attribute table, -1 if unknown
+    team_rows = attributes.index.get_indexer(faceoff_df["playerid_team"])
+    opponent_rows = attributes.index.get_indexer(faceoff_df["playerid_opponent"])
+
+    # Inner join: both players must be known
+    known = (team_rows >= 0) & (opponent_rows >= 0)
+    if not known.all():
+        faceoff_df = faceoff_df[known]
+        team_rows, opponent_rows = team_rows[known], opponent_rows[known]
+
+    height = attributes["height"].to_numpy()
+    weight = attributes["weight"].to_numpy()
+    shoots = attributes["shoots"].array
+
+    faceoff_df = faceoff_df.assign(
+        shoots_team=shoots.take(team_rows),
+        shoots_opponent=shoots.take(opponent_rows),
+        # Create player differences
+        height_diff=height.take(team_rows) - height.take(opponent_rows),
+        weight_diff=weight.take(team_rows) - weight.take(opponent_rows),
+    )
+
+    # Create Shoots Same Boolean
+    faceoff_df["shoots_same"] = (
+        faceoff_df["shoots_team"].to_numpy() == faceoff_df["shoots_opponent"].to_numpy()
+    ).astype(int)
+
+    return enforce_schema(faceoff_df)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import shap
+
+# Rows of the test set the global summary is computed over, at most
+SUMMARY_ROWS = 2000
+
+
+def _contributions(model, X: np.ndarray) -> tuple[np.ndarray, float, str]:
+    # SHAP values of a win for every row & feature, the base value they add
+    # to, and the scale they are on: the forest's are win probabilities,
+    # the boosted model's log-odds
+    explainer = shap.TreeExplainer(model)
+    values = explainer.shap_values(X)
+    base_value = np.atleast_1d(explainer.expected_value)[-1]
+    if values.ndim == 3:
+        return values[..., 1], float(base_value), "probability"
+    return values, float(base_value), "log-odds"
+
+
+def explain_model(model, X_test: np.ndarray, features: list[str]) -> dict:
+    """Global SHAP summary of a trained model over (a sample of) its test set.
+
+    `importance` ranks the features by their mean absolute SHAP value, and
+    `values` holds every explained row's SHAP values alongside `X`.
+    """
+    X = X_test[:SUMMARY_ROWS]
+    values, base_value, scale = _contributions(model, X)
+
+    importance = (
+        pd.DataFrame(
+            {
+                "feature": features,
+                "mean_abs_shap": np.abs(values).mean(axis=0),
+                "mean_shap": values.mean(axis=0),
+            }
+        )
+        .sort_values("mean_abs_shap", ascending=False)
+        .reset_index(drop=True)
+    )
+
+    return {
+        "importance": importance,
+        "values": values.astype(np.float32),
+        "X": X,
+        "base_value": base_value,
+        "scale": scale,
+    }
+
+
+def explain_predictions(model, input_df: pd.DataFrame, player_ids: pd.Series) -> dict:
+    """SHAP values of every player's prediction in one situation.
+
+    `input_df` and `player_ids` are the output of `situation_input_df`.
+    `contributions` holds one row per player, indexed by player id.
+    """
+    values, base_value, scale = _contributions(model, input_df.to_numpy(np.float32))
+    return {
+        "contributions": pd.DataFrame(
+            values, columns=input_df.columns, index=pd.Index(player_ids)
+        ),
+        "inputs": input_df.set_index(pd.Index(player_ids)),
+        "base_value": base_value,
+        "scale": scale,
+    }
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from core.aggregates import player_win_rates
+
+MODEL_FEATURES = [
+    "score_team",
+    "score_diff",
+    "home",
+    "players_diff",
+    "seconds_elapsed__game",
+    "zone__offense",
+    "zone__defense",
+    "playerid_team__win_rate",
+    "opposing_team__win_rate",
+]
+
+# Game situation a prediction is made for, as entered in the app
+SITUATION_COLUMNS = [
+    "home",
+    "players_diff",
+    "seconds_elapsed__game",
+    "zone__offense",
+    "zone__defense",
+    "score_team",
+    "score_diff",
+]
+
+
+def game_keys(df: pd.DataFrame) -> np.ndarray:
+    # One integer per game, e.g. 20231042 for game 1042 of the 2023 season
+    return df["season"].to_numpy(np.int64) * 10_000 + df["gameID"].to_numpy(np.int64)
+
+
+def build_feature_matrix(
+    faceoff_df: pd.DataFrame, team_win_rates: pd.DataFrame, features: list[str]
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Model inputs & labels for a team's faceoffs, leaving `faceoff_df` as is.
+
+    `team_win_rates` is the output of `calculate_team_aggregate_win_rates`.
+    Returns X, a C-contiguous float32 matrix with one column per feature (in
+    `features` order), the win labels and each row's game (see `game_keys`).
+    Faceoffs without a player id are dropped.
+    """
+    player_rates = player_win_rates(faceoff_df).set_index("playerid_team")["win_pct"]
+    opponent_rates = team_win_rates.set_index("teamcode")["win_rate"]
+    faceoff_df = faceoff_df[faceoff_df["playerid_team"].isin(player_rates.index)]
+
+    # Features that are not columns of the faceoff data
+    derived = {
+        "score__trailing": lambda: faceoff_df["score_diff"] < 0,
+        "score__leading": lambda: faceoff_df["score_diff"] > 0,
+        "zone__offense": lambda: faceoff_df["zone"] == "offense",
+        "zone__defense": lambda: faceoff_df["zone"] == "defense",
+        "playerid_team__win_rate": lambda: faceoff_df["playerid_team"].map(
+            player_rates
+        ),
+        "opposing_team__win_rate": lambda: faceoff_df["opponent"]
+        .astype(str)
+        .map(opponent_rates),
+    }
+
+    # Filled a column at a time, so no wide intermediate frame is built
+    X = np.empty((len(faceoff_df), len(features)), dtype=np.float32)
+    for i, feature in enumerate(features):
+        column = derived[feature]() if feature in derived else faceoff_df[feature]
+        X[:, i] = column.to_numpy(np.float32, na_value=np.nan)
+
+    return X, faceoff_df["win"].to_numpy(np.int8), game_keys(faceoff_df)
+
+
+def situation_input_df(
+    situation: dict,
+    player_agg_df: pd.DataFrame,
+    opposing_team_win_pct: float,
+    features: list[str],
+) -> tuple[pd.DataFrame, pd.Series]:
+    """Model inputs for every player in one game situation.
+
+    `player_agg_df` is the output of `player_win_rates`. Returns the inputs
+    (columns in `features` order) and the player id of each row.
+    """
+    input_df = pd.DataFrame([{key: situation[key] for key in SITUATION_COLUMNS}])
+    input_df[["home", "zone__defense", "zone__offense"]] = input_df[
+        ["home", "zone__defense", "zone__offense"]
+    ].astype(int)
+
+    # Merge in Individual Team Player Data
+    input_df = pd.merge(
+        left=input_df,
+        right=player_agg_df[["playerid_team", "win_pct"]],
+        how="cross",
+    )
+    input_df.rename(columns={"win_pct": "playerid_team__win_rate"}, inplace=True)
+
+    # Add Aggregate Opponent Win Rate
+    input_df["opposing_team__win_rate"] = opposing_team_win_pct
+
+    # Trim Columns to Match X
+    return input_df[features], input_df["playerid_team"]
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = [
+    "season",
+    "period",
+    "zone",
+    "opponent",
+    "home",
+    "power_play",
+    "short_handed",
+    "empty_net",
+    "extra_attacker",
+    "score_state",
+]
+
+# Filter selections (named after their widget keys) that leave every row in
+FILTER_DEFAULTS = {
+    "home_filter": "All",
+    "opponent_filter": [],
+    "season_filter": [],
+    "period_filter": [],
+    "zone_filter": [],
+    "strength_filter": "All",
+    "net_filter": "All",
+    "scorestate_filter": "All",
+}
+
+
+def build_filter_masks(df: pd.DataFrame) -> dict[str, dict]:
+    """Precompute one boolean mask per value of every filterable column."""
+    masks = {}
+    for col in FILTER_COLUMNS:
+        codes, values = pd.factorize(df[col])
+        masks[col] = {value: codes == i for i, value in enumerate(values)}
+    return masks
+
+
+def filter_mask(masks: dict, n_rows: int, filters: dict) -> np.ndarray | None:
+    """Combine the selected filters into one boolean mask.
+
+    `masks` comes from `build_filter_masks` on a frame of `n_rows` rows, and
+    `filters` holds selections keyed as in FILTER_DEFAULTS (missing keys are
+    unfiltered). Returns None when no filter is active.
+    """
+    filters = {**FILTER_DEFAULTS, **filters}
+
+    def value_mask(col, values):
+        # Rows matching any of the values; values absent from the data match nothing
+        mask = np.zeros(n_rows, dtype=bool)
+        for value in values:
+            if value in masks[col]:
+                mask |= masks[col][value]
+        return mask
+
+    def any_value_mask(col, values):
+        # Selecting every value present is a no-op, so skip the OR entirely
+        if set(masks[col]) <= set(values):
+            return None
+        return value_mask(col, values)
+
+    selected = []
+
+    # Apply Home Filter
+    if filters["home_filter"] == "Home":
+        selected.append(value_mask("home", [1]))
+    elif filters["home_filter"] == "Away":
+        selected.append(value_mask("home", [0]))
+
+    # Apply opponent, season, period & zone filters
+    for col, key in [
+        ("opponent", "opponent_filter"),
+        ("season", "season_filter"),
+        ("period", "period_filter"),
+        ("zone", "zone_filter"),
+    ]:
+        if filters[key] != []:
+            selected.append(any_value_mask(col, filters[key]))
+
+    # Apply strength filter
+    if filters["strength_filter"] == "Power Play":
+        selected.append(value_mask("power_play", [1]))
+    elif filters["strength_filter"] == "Even Strength":
+        selected.append(value_mask("power_play", [0]) & value_mask("short_handed", [0]))
+    elif filters["strength_filter"] == "Short Handed":
+        selected.append(value_mask("short_handed", [1]))
+
+    # Apply net situation filter
+    if filters["net_filter"] == "Empty Net":
+        selected.append(value_mask("empty_net", [1]))
+    elif filters["net_filter"] == "Extra Attacker":
+        selected.append(value_mask("extra_attacker", [1]))
+    elif filters["net_filter"] == "Standard":
+        selected.append(
+            value_mask("empty_net", [0]) & value_mask("extra_attacker", [0])
+        )
+
+    # Apply score state filter
+    if filters["scorestate_filter"] != "All":
+        selected.append(
+            value_mask("score_state", [filters["scorestate_filter"].lower()])
+        )
+
+    selected = [mask for mask in selected if mask is not None]
+    if selected == []:
+        return None
+
+    return np.logical_and.reduce(selected)
+
+
+def filter_faceoff_df(
+    df: pd.DataFrame, filters: dict, masks: dict | None = None
+) -> pd.DataFrame:
+    """Apply the selected filters to faceoff dataframe.
+
+    Every active filter ANDs precomputed value masks together, and the
+    filtered frame is materialized once at the end.
+    """
+    if masks is None:
+        masks = build_filter_masks(df)
+
+    mask = filter_mask(masks, len(df), filters)
+    if mask is None:
+        return df.copy()
+
+    return df[mask]
+
+
+def build_summary_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Faceoff and win counts for every combination of the filter columns."""
+    return (
+        df.groupby(FILTER_COLUMNS, dropna=False, observed=True)
+        .agg(faceoffs=("gameID", "count"), wins=("win", "sum"))
+        .reset_index()
+    )
+
+
+def summarize_cube(
+    cube: pd.DataFrame, dimensions: list[str], filters: dict, masks: dict | None = None
+) -> pd.DataFrame:
+    """Roll the cube up to `dimensions`, after slicing it by the selected filters.
+
+    Gives the same table as grouping the filtered faceoffs by `dimensions`.
+    """
+    if masks is None:
+        masks = build_filter_masks(cube)
+
+    mask = filter_mask(masks, len(cube), filters)
+    if mask is not None:
+        cube = cube[mask]
+
+    summary_df = (
+        cube.groupby(dimensions, observed=True)
+        .agg(faceoffs=("faceoffs", "sum"), wins=("wins", "sum"))
+        .reset_index()
+    )
+    summary_df["win_pct"] = summary_df["wins"] / summary_df["faceoffs"]
+
+    return summary_df
@@ -0,0 +1,419 @@
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+
+from sklearn.model_selection import train_test_split
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.utils.class_weight import compute_class_weight
+from xgboost import XGBClassifier
+from sklearn.calibration import calibration_curve
+from sklearn.metrics import (
+    accuracy_score,
+    brier_score_loss,
+    confusion_matrix,
+    f1_score,
+    log_loss,
+    precision_score,
+    recall_score,
+    roc_auc_score,
+    roc_curve,
+)
+
+ENGINES = {
+    "random_forest": "Random Forest",
+    "xgboost": "Gradient Boosting (XGBoost)",
+}
+
+# Hyperparameters the app starts from, per engine
+DEFAULT_PARAMS = {
+    "engine": "random_forest",
+    "max_depth": 4,
+    "n_estimators": 200,
+    "min_samples_split": 0.1,
+    "min_samples_leaf": 0.05,
+    "max_features": None,
+}
+BOOSTED_PARAMS = {
+    "engine": "xgboost",
+    "max_depth": 4,
+    "n_estimators": 200,
+    "learning_rate": 0.1,
+}
+ENGINE_PARAMS = {"random_forest": DEFAULT_PARAMS, "xgboost": BOOSTED_PARAMS}
+
+# Boosting stops once the validation log loss has not improved for this many
+# rounds; the validation set is this share of the training split
+EARLY_STOPPING_ROUNDS = 20
+VALIDATION_SIZE = 0.2
+
+# Incremental updates add trees (forest) or boosting rounds (xgboost) fit on
+# the new games plus a replayed sample of the rows trained on before. A full
+# retrain is due instead once the rows added since the last full fit are too
+# large a share of it, or the model's Brier score on the new games has risen
+# more than MAX_CALIBRATION_DRIFT over the full fit's. Fewer new rows than
+# MIN_DRIFT_ROWS are too few to tell drift from noise, so are not checked
+UPDATE_TREES = 20
+MAX_UPDATE_SHARE = 0.25
+MAX_CALIBRATION_DRIFT = 0.02
+MIN_DRIFT_ROWS = 200
+
+# Old training rows replayed per new row, and at least this many
+UPDATE_REPLAY_PER_ROW = 4
+UPDATE_MIN_REPLAY = 200
+
+# Old training rows an update is validated on, alongside the held out new rows
+UPDATE_MIN_VALIDATION = 200
+
+# Boosting rounds added by an update stop once the validation log loss has not
+# improved for this many rounds
+UPDATE_EARLY_STOPPING_ROUNDS = 5
+
+# Every fifth new row is held out to evaluate an update on
+UPDATE_HOLDOUT_EVERY = 5
+
+# An update is only discarded when it scores worse than the model it was built
+# on by more than this many standard errors of the metric on the test set
+UPDATE_TOLERANCE_SE = 1.0
+
+# Entry keys built from the model afterwards (e.g. by `core.pipeline`), which
+# an update of the model leaves behind
+MODEL_ARTIFACTS = ["recommendations", "explanation"]
+
+
+def _update_holdout(n_rows: int) -> np.ndarray:
+    return np.arange(n_rows) % UPDATE_HOLDOUT_EVERY == UPDATE_HOLDOUT_EVERY - 1
+
+
+def _brier_standard_error(y: np.ndarray, proba: np.ndarray) -> float:
+    return float(np.std((proba - y) ** 2) / np.sqrt(len(y)))
+
+
+def _auc_standard_error(y: np.ndarray, auc: float) -> float:
+    # Hanley & McNeil (1982)
+    n_pos, n_neg = int(y.sum()), int(len(y) - y.sum())
+    q1, q2 = auc / (2 - auc), 2 * auc**2 / (1 + auc)
+    variance = (
+        auc * (1 - auc) + (n_pos - 1) * (q1 - auc**2) + (n_neg - 1) * (q2 - auc**2)
+    ) / (n_pos * n_neg)
+    return float(np.sqrt(max(variance, 0.0)))
+
+
+def fit_boosted_model(X: np.ndarray, y: np.ndarray, params: dict) -> XGBClassifier:
+    """Histogram gradient boosting on every core, stopped early on a held out set."""
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X, y, test_size=VALIDATION_SIZE, random_state=42, stratify=y
+    )
+    model = XGBClassifier(
+        tree_method="hist",
+        n_jobs=-1,
+        random_state=42,
+        eval_metric="logloss",
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        # Weight wins & losses equally, as the forest's balanced class weights do
+        scale_pos_weight=(y_fit == 0).sum() / max((y_fit == 1).sum(), 1),
+        **params,
+    )
+    model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+    return model
+
+
+def boosting_rounds(model: XGBClassifier) -> int:
+    """Rounds a boosted model predicts with: up to its best, if stopped early."""
+    best_iteration = getattr(model, "best_iteration", None)
+    if best_iteration is None:
+        return model.get_booster().num_boosted_rounds()
+    return best_iteration + 1
+
+
+def evaluation_curves(
+    y_test: np.ndarray, y_pred: np.ndarray, y_proba: np.ndarray
+) -> dict:
+    """Arrays behind the evaluation charts: confusion matrix, calibration & ROC."""
+    prob_true, prob_pred = calibration_curve(y_test, y_proba, n_bins=25)
+    fpr, tpr, _ = roc_curve(y_test, y_proba)
+    return {
+        "confusion_matrix": confusion_matrix(y_test, y_pred),
+        "calibration": {"prob_pred": prob_pred, "prob_true": prob_true},
+        "roc": {"fpr": fpr, "tpr": tpr},
+    }
+
+
+def _evaluate(model, X_test: np.ndarray, y_test: np.ndarray) -> dict:
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test)[:, 1]
+
+    # Evaluation Metrics
+    metrics = {
+        "AUC": roc_auc_score(y_test, y_proba),
+        "Accuracy": accuracy_score(y_test, y_pred),
+        "F1 Score": f1_score(y_test, y_pred),
+        "Precision": precision_score(y_test, y_pred),
+        "Recall": recall_score(y_test, y_pred),
+    }
+
+    return {
+        "metrics": metrics,
+        "brier": brier_score_loss(y_test, y_proba),
+        "X_test": X_test,
+        "y_test": y_test,
+        "y_pred": y_pred,
+        "y_proba": y_proba,
+        "curves": evaluation_curves(y_test, y_pred, y_proba),
+    }
+
+
+def train_faceoff_model(
+    X: np.ndarray, y: np.ndarray, params: dict, games: np.ndarray | None = None
+) -> dict:
+    """Fit the faceoff model on an 80/20 split and evaluate it on the test set.
+
+    X, y and `games` are as built by `core.features.build_feature_matrix`;
+    the games each row came from are recorded so the model can later be
+    updated with new games only. `params` holds the engine (a key of ENGINES)
+    and its hyperparameters, as in ENGINE_PARAMS.
+    """
+    engine = params.get("engine", "random_forest")
+    engine_params = {key: value for key, value in params.items() if key != "engine"}
+
+    # Split Data & Fit and Predict Model; the test rows' positions are kept
+    # so an update can tell them from the rows trained on
+    train_rows, test_rows = train_test_split(
+        np.arange(len(X)), test_size=0.2, random_state=42, stratify=y
+    )
+    X_train, X_test, y_train, y_test = (
+        X[train_rows],
+        X[test_rows],
+        y[train_rows],
+        y[test_rows],
+    )
+    start = time.perf_counter()
+    if engine == "xgboost":
+        model = fit_boosted_model(X_train, y_train, engine_params)
+    else:
+        model = RandomForestClassifier(
+            random_state=42, class_weight="balanced", **engine_params
+        )
+        model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - start
+    evaluation = _evaluate(model, X_test, y_test)
+
+    return {
+        "model": model,
+        "params": params,
+        "engine": engine,
+        "train_seconds": train_seconds,
+        "rows": len(X),
+        "games": None if games is None else np.unique(games),
+        "test_rows": test_rows,
+        "update": None,
+        **evaluation,
+        "full_fit": {"rows": len(X), "brier": evaluation["brier"]},
+    }
+
+
+def retrain_reason(
+    entry: dict, X: np.ndarray, y: np.ndarray, games: np.ndarray
+) -> str | None:
+    """Why `entry` should be retrained in full on (X, y) rather than updated.
+
+    Returns None when an incremental update (see `update_faceoff_model`) will
+    do: the new games are a small share of the data and the model is still
+    calibrated on them.
+    """
+    if entry.get("games") is None or entry.get("test_rows") is None:
+        return "the model does not record the games it was trained on"
+    if not np.isin(entry["games"], games).all():
+        return "games the model was trained on are no longer in the data"
+    new = ~np.isin(games, entry["games"])
+    if not new.any():
+        return "no new games, so the existing rows have changed"
+    if (~new).sum() != entry["rows"]:
+        return "the rows of games the model was trained on have changed"
+    added = new.sum() + (entry["update"] or {}).get("new_rows", 0)
+    if added > MAX_UPDATE_SHARE * entry["full_fit"]["rows"]:
+        return (
+            f"{added:,} rows added since the last full fit, over {MAX_UPDATE_SHARE:.0%}"
+        )
+
+    if new.sum() >= MIN_DRIFT_ROWS:
+        drift = (
+            brier_score_loss(y[new], entry["model"].predict_proba(X[new])[:, 1])
+            - entry["full_fit"]["brier"]
+        )
+        if drift > MAX_CALIBRATION_DRIFT:
+            return f"the Brier score on new games rose by {drift:.3f}"
+
+    return None
+
+
+def update_faceoff_model(
+    entry: dict, X: np.ndarray, y: np.ndarray, games: np.ndarray
+) -> dict:
+    """Update a trained entry with the rows of games it has not seen yet.
+
+    Every UPDATE_HOLDOUT_EVERY-th new row is held out and added to the test
+    set; the rest are fit alongside a replayed sample of the rows trained on
+    before, so a handful of new faceoffs cannot drag the model around. The
+    forest grows trees in proportion to the new rows' share of the data (up
+    to UPDATE_TREES, warm start), and the boosted model continues boosting
+    for up to UPDATE_TREES rounds, stopped early on the held out new rows
+    plus a slice of the old training rows. Rows of the games trained on are
+    assumed to keep their order, as `build_feature_matrix` leaves them.
+    """
+    new = ~np.isin(games, entry["games"])
+    new_rows, old_rows = np.flatnonzero(new), np.flatnonzero(~new)
+    previous = entry["update"] or {"new_rows": 0, "new_games": 0, "updates": 0}
+    holdout = _update_holdout(len(new_rows))
+
+    # Old training rows (never its test rows), shuffled, to replay & validate on
+    old_train = np.setdiff1d(old_rows, old_rows[entry["test_rows"]])
+    old_train = np.random.default_rng(42).permutation(old_train)
+    n_replay = max(UPDATE_REPLAY_PER_ROW * len(new_rows), UPDATE_MIN_REPLAY)
+    fit_rows = np.concatenate([new_rows[~holdout], old_train[:n_replay]])
+    n_validation = max(int(VALIDATION_SIZE * len(fit_rows)), UPDATE_MIN_VALIDATION)
+    validation_rows = np.concatenate(
+        [new_rows[holdout], old_train[n_replay : n_replay + n_validation]]
+    )
+
+    start = time.perf_counter()
+    if entry["engine"] == "xgboost":
+        model = XGBClassifier(
+            **{
+                **entry["model"].get_params(),
+                "n_estimators": UPDATE_TREES,
+                "early_stopping_rounds": UPDATE_EARLY_STOPPING_ROUNDS,
+            }
+        )
+        # Boosting continues from the rounds the model predicts with, dropping
+        # those fit after its best iteration
+        booster = entry["model"].get_booster()
+        model.fit(
+            X[fit_rows],
+            y[fit_rows],
+            xgb_model=booster[: boosting_rounds(entry["model"])],
+            eval_set=[(X[validation_rows], y[validation_rows])],
+            verbose=False,
+        )
+        # Rounds that do not beat the model's own validation loss are noise
+        # from the few rows fit, so the model is kept as it was
+        base_loss = log_loss(
+            y[validation_rows],
+            entry["model"].predict_proba(X[validation_rows])[:, 1],
+            labels=[0, 1],
+        )
+        if model.best_score >= base_loss:
+            model = entry["model"]
+        added = boosting_rounds(model) - boosting_rounds(entry["model"])
+    else:
+        # Copied so the cached model is never modified. Class weights are
+        # balanced over all the rows, not just the ones fit
+        model = copy.deepcopy(entry["model"])
+        added = min(
+            UPDATE_TREES,
+            max(1, round(model.n_estimators * len(new_rows) / entry["rows"])),
+        )
+        model.set_params(
+            warm_start=True,
+            n_estimators=model.n_estimators + added,
+            class_weight=dict(
+                zip(
+                    model.classes_,
+                    compute_class_weight("balanced", classes=model.classes_, y=y),
+                )
+            ),
+        )
+        model.fit(X[fit_rows], y[fit_rows])
+    train_seconds = time.perf_counter() - start
+
+    test_rows = np.concatenate([old_rows[entry["test_rows"]], new_rows[holdout]])
+    return {
+        **{key: value for key, value in entry.items() if key not in MODEL_ARTIFACTS},
+        "model": model,
+        "train_seconds": train_seconds,
+        "rows": len(X),
+        "games": np.union1d(entry["games"], games[new]),
+        "test_rows": test_rows,
+        "retrain_reason": None,
+        # Totals since the last full fit
+        "update": {
+            "new_rows": previous["new_rows"] + len(new_rows),
+            "new_games": previous["new_games"] + len(np.unique(games[new])),
+            "updates": previous["updates"] + 1,
+            "trees_added": added,
+        },
+        **_evaluate(model, X[test_rows], y[test_rows]),
+    }
+
+
+def update_regression(base: dict, updated: dict) -> str | None:
+    """How an update scores worse than the model it was built on, if it does.
+
+    Both are scored on the updated entry's test set: the base model's test
+    rows plus the held out new rows. Differences within UPDATE_TOLERANCE_SE
+    standard errors of the base model's score are taken as noise.
+    """
+    y_test = updated["y_test"]
+    base_proba = base["model"].predict_proba(updated["X_test"])[:, 1]
+    base_brier = brier_score_loss(y_test, base_proba)
+    base_auc = roc_auc_score(y_test, base_proba)
+
+    brier_tolerance = UPDATE_TOLERANCE_SE * _brier_standard_error(y_test, base_proba)
+    if updated["brier"] > base_brier + brier_tolerance:
+        return (
+            f"the update raised the Brier score from {base_brier:.5f} "
+            f"to {updated['brier']:.5f}"
+        )
+    auc_tolerance = UPDATE_TOLERANCE_SE * _auc_standard_error(y_test, base_auc)
+    if updated["metrics"]["AUC"] < base_auc - auc_tolerance:
+        return (
+            f"the update lowered the AUC from {base_auc:.1%} "
+            f"to {updated['metrics']['AUC']:.1%}"
+        )
+    return None
+
+
+def refresh_faceoff_model(
+    entry: dict | None,
+    X: np.ndarray,
+    y: np.ndarray,
+    params: dict,
+    games: np.ndarray,
+) -> dict:
+    """Update `entry` with the games added since, or retrain when one is due.
+
+    An update that scores worse than the model it was built on (see
+    `update_regression`) is discarded for a full retrain as well. A full
+    retrain records why under "retrain_reason".
+    """
+    reason = None if entry is None else retrain_reason(entry, X, y, games)
+    if entry is not None and reason is None:
+        updated = update_faceoff_model(entry, X, y, games)
+        reason = update_regression(entry, updated)
+        if reason is None:
+            return updated
+
+    trained = train_faceoff_model(X, y, params, games)
+    trained["retrain_reason"] = reason
+    return trained
+
+
+def predict_faceoff_winners(
+    model, input_df: pd.DataFrame, player_ids: pd.Series
+) -> pd.DataFrame:
+    """Every player's chance to win the faceoff, best first."""
+    # As a float32 matrix, like the feature matrix the model was fit on
+    predictions = model.predict_proba(input_df.to_numpy(np.float32))
+    predictions_df = pd.DataFrame(predictions)
+
+    # Add Player Info
+    predictions_df["playerid_team"] = player_ids
+    predictions_df = (
+        predictions_df[["playerid_team", 1]]
+        .rename(columns={1: "Chance to Win"})
+        .sort_values("Chance to Win", ascending=False)
+        .reset_index(drop=True)
+    )
+
+    return predictions_df
@@ -0,0 +1,168 @@
+"""Precompute every team's model and recommendation table ahead of game day.
+
+Reads the local data store, so bring it up to date first (see
+`utilities.ingest`). Run from the repository root:
+
+    python -m core.pipeline --workers 4
+    python -m core.pipeline --teams NSH BOS --engine xgboost
+
+A team whose model was registered by an earlier run is updated with the games
+added since, rather than retrained, unless a full retrain is due (see
+`core.model.retrain_reason`).
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from core.aggregates import (
+    calculate_team_aggregate_win_rates,
+    league_faceoff_rates,
+    player_win_rates,
+    team_codes_df,
+)
+from core.cleaning import (
+    build_team_perspective_df,
+    merge_player_info,
+    read_team_codes,
+    select_team_faceoffs,
+)
+from core.explain import explain_model
+from core.features import MODEL_FEATURES, build_feature_matrix
+from core.model import ENGINE_PARAMS, refresh_faceoff_model
+from utilities.recommend import build_recommendation_table, recommendation_key
+from utilities.registry import (
+    MODEL_DIR,
+    has_model,
+    latest_model,
+    lineage_key,
+    model_fingerprint,
+    save_model,
+)
+from utilities.store import STORE_DIR, read_store
+
+
+def prepare_team(
+    faceoff_df: pd.DataFrame,
+    team_win_rates: pd.DataFrame,
+    params: dict,
+    model_dir: str = MODEL_DIR,
+    base: dict | None = None,
+) -> dict:
+    """Train one team's model and build its recommendation table & SHAP summary.
+
+    `faceoff_df` is the team's unfiltered faceoffs with player info, as the
+    app sees them, so the app finds the model under the same fingerprint.
+    `base` is the team's previous entry, if any, to update with new games.
+    Returns the fingerprint, the registry entry (None if the registry already
+    holds it) and the seconds each stage took.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    X, y, games = build_feature_matrix(faceoff_df, team_win_rates, MODEL_FEATURES)
+    fingerprint = model_fingerprint(X, y, features=MODEL_FEATURES, params=params)
+    timings["features"] = time.perf_counter() - start
+
+    if has_model(fingerprint, model_dir):
+        return {"fingerprint": fingerprint, "entry": None, "timings": timings}
+
+    start = time.perf_counter()
+    entry = refresh_faceoff_model(base, X, y, params, games)
+    timings["update" if entry["update"] else "train"] = time.perf_counter() - start
+
+    # Recommendation table for the unfiltered roster, keyed as the app keys it
+    start = time.perf_counter()
+    roster_win_rates = player_win_rates(faceoff_df).set_index("playerid_team")[
+        "win_pct"
+    ]
+    opponent_win_rates = team_win_rates.set_index("teamcode")["win_rate"]
+    entry["recommendations"] = {
+        recommendation_key(roster_win_rates, opponent_win_rates): (
+            build_recommendation_table(
+                entry["model"],
+                features=MODEL_FEATURES,
+                player_win_rates=roster_win_rates,
+                opponent_win_rates=opponent_win_rates,
+            )
+        )
+    }
+    timings["recommendations"] = time.perf_counter() - start
+
+    # SHAP summary over the test set, as the app shows it
+    start = time.perf_counter()
+    entry["explanation"] = explain_model(
+        entry["model"], entry["X_test"], MODEL_FEATURES
+    )
+    timings["explanation"] = time.perf_counter() - start
+
+    return {"fingerprint": fingerprint, "entry": entry, "timings": timings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--teams", nargs="+", help="Team codes (default: all)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--models", default=MODEL_DIR)
+    parser.add_argument(
+        "--engine", choices=list(ENGINE_PARAMS), default="random_forest"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    faceoffs_df, player_df = read_store(args.store)
+    league_df = merge_player_info(build_team_perspective_df(faceoffs_df), player_df)
+    team_win_rates = calculate_team_aggregate_win_rates(
+        league_faceoff_rates(faceoffs_df), team_codes_df(read_team_codes())
+    )
+    teams = args.teams or sorted(league_df.index.unique())
+    print(f"Prepared league tables in {time.perf_counter() - start:.1f}s")
+
+    # One lineage per team, so each run builds on the team's last model
+    params = ENGINE_PARAMS[args.engine]
+    lineages = {team: lineage_key([team], MODEL_FEATURES, params) for team in teams}
+
+    # Teams are independent; registry reads & writes stay in this process
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(
+                prepare_team,
+                select_team_faceoffs(league_df, team),
+                team_win_rates,
+                params,
+                args.models,
+                latest_model(lineages[team], args.models),
+            ): team
+            for team in teams
+        }
+        for future in as_completed(futures):
+            team = futures[future]
+            try:
+                result = future.result()
+            except ValueError as e:
+                # e.g. too few faceoffs to stratify a train/test split
+                print(f"{team}: skipped ({e})")
+                continue
+
+            if result["entry"] is None:
+                status = "already registered"
+            else:
+                save_model(
+                    result["fingerprint"],
+                    result["entry"],
+                    args.models,
+                    lineage=lineages[team],
+                )
+                status = f"AUC {result['entry']['metrics']['AUC']:.1%}"
+            timings = ", ".join(
+                f"{stage} {seconds:.1f}s"
+                for stage, seconds in result["timings"].items()
+            )
+            print(f"{team}: {result['fingerprint']} {status} ({timings})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import StratifiedKFold
+
+# Values offered for each hyperparameter; all fit the app's parameter inputs
+PARAM_GRID = {
+    "max_depth": [2, 4, 6, 8],
+    "n_estimators": [50, 100, 200],
+    "min_samples_split": [0.05, 0.1, 0.2],
+    "min_samples_leaf": [0.01, 0.05, 0.1],
+    "max_features": [None, 3, 6],
+}
+
+
+def grid_configs(grid: dict[str, list]) -> list[dict]:
+    """Every combination of the values in `grid`."""
+    return [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+
+def config_key(params: dict) -> str:
+    return json.dumps(params, sort_keys=True)
+
+
+def cross_validate(X: np.ndarray, y: np.ndarray, params: dict, folds: int) -> dict:
+    """Mean and spread of the model's test scores over stratified k folds."""
+    aucs, accuracies = [], []
+    for train_index, test_index in StratifiedKFold(
+        n_splits=folds, shuffle=True, random_state=42
+    ).split(X, y):
+        model = RandomForestClassifier(
+            random_state=42, class_weight="balanced", **params
+        )
+        model.fit(X[train_index], y[train_index])
+        y_test = y[test_index]
+        aucs.append(roc_auc_score(y_test, model.predict_proba(X[test_index])[:, 1]))
+        accuracies.append(accuracy_score(y_test, model.predict(X[test_index])))
+
+    return {
+        "auc": float(np.mean(aucs)),
+        "auc_std": float(np.std(aucs)),
+        "accuracy": float(np.mean(accuracies)),
+    }
+
+
+# Training data of a sweep worker process, sent once when the worker starts
+# rather than with every configuration
+_worker_data = {}
+
+
+def _init_worker(X: np.ndarray, y: np.ndarray):
+    _worker_data.update(X=X, y=y)
+
+
+def _cross_validate_worker(params: dict, folds: int) -> dict:
+    return cross_validate(_worker_data["X"], _worker_data["y"], params, folds)
+
+
+def run_sweep(
+    X: np.ndarray,
+    y: np.ndarray,
+    configs: list[dict],
+    folds: int = 5,
+    workers: int | None = None,
+    on_result=None,
+) -> dict[str, dict]:
+    """Cross-validate every configuration on a pool of `workers` processes.
+
+    Uses every core by default. `on_result(params, scores)` is called as each
+    configuration finishes. Returns the scores keyed by `config_key`.
+    """
+    results = {}
+    if configs == []:
+        return results
+
+    # Spawned (not forked) workers are safe to start from a threaded server
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(X, y),
+    ) as executor:
+        futures = {
+            executor.submit(_cross_validate_worker, params, folds): params
+            for params in configs
+        }
+        for future in as_completed(futures):
+            params, scores = futures[future], future.result()
+            results[config_key(params)] = scores
+            if on_result is not None:
+                on_result(params, scores)
+
+    return results
@@ -0,0 +1,111 @@
+import streamlit as st
+import pandas as pd
+
+from core.aggregates import LEADERBOARD_SPLITS
+from utilities.extract import load_team_codes
+from utilities.profiling import stage_timer
+from utilities.transform import load_leaderboards
+
+SPLIT_LABELS = {
+    "overall": "Overall",
+    "zone": "Zone",
+    "strength": "Strength",
+    "score_state": "Score State",
+}
+
+
+def ranked(table: pd.DataFrame, split: str, value, min_faceoffs: int) -> pd.DataFrame:
+    """Rows of one split value with enough faceoffs, best win rate first."""
+    ranked_df = table.xs((split, value), level=["split", "value"]).reset_index()
+    ranked_df = ranked_df[ranked_df["faceoffs"] >= min_faceoffs]
+    ranked_df = ranked_df.sort_values(
+        ["win_rate", "faceoffs"], ascending=False
+    ).reset_index(drop=True)
+    ranked_df.insert(0, "rank", ranked_df.index + 1)
+    return ranked_df
+
+
+def league_section():
+
+    # League tables are built once per dataset, whichever team is selected
+    with stage_timer("load_leaderboards", cached=True):
+        teams, players = load_leaderboards(
+            st.session_state.faceoff_df__league, st.session_state.data_version
+        )
+    teamnames = {code: name for name, code in load_team_codes().items()}
+
+    st.subheader("League Leaderboard", divider="gray")
+    st.caption(
+        "Every team and faceoff taker across the league, ranked by win rate. "
+        "The filters on the Summary tab do not apply here."
+    )
+
+    # Rank by any value of any split, e.g. Zone: Offense
+    options = [("overall", "all")] + [
+        (split, value)
+        for split in LEADERBOARD_SPLITS
+        for value in teams.xs(split, level="split").index.unique(level="value")
+    ]
+    cols = st.columns([4, 2])
+    with cols[0]:
+        split, value = st.selectbox(
+            "Rank By",
+            options=options,
+            format_func=lambda option: (
+                SPLIT_LABELS[option[0]]
+                if option[0] == "overall"
+                else f"{SPLIT_LABELS[option[0]]}: {option[1].replace('_', ' ').title()}"
+            ),
+            key="leaderboard_split",
+        )
+    with cols[1]:
+        min_faceoffs = st.number_input(
+            "Min. Player Faceoffs",
+            min_value=1,
+            value=100,
+            step=25,
+            help="Leave out players with fewer faceoffs in the selected split.",
+            key="leaderboard_min_faceoffs",
+        )
+
+    team_df = ranked(teams, split, value, min_faceoffs=1)
+    team_df["teamname"] = team_df["team"].astype(str).map(teamnames)
+
+    player_df = ranked(players, split, value, min_faceoffs=min_faceoffs)
+
+    win_rate_column = st.column_config.ProgressColumn(
+        "Win Rate", help="Faceoff win percentage."
+    )
+
+    cols = st.columns([4, 5])
+    with cols[0]:
+        st.markdown("#### Teams")
+        st.dataframe(
+            team_df,
+            height=650,
+            hide_index=True,
+            column_order=["rank", "teamname", "faceoffs", "win_rate"],
+            column_config={
+                "rank": st.column_config.NumberColumn("Rank"),
+                "teamname": st.column_config.TextColumn("Team"),
+                "faceoffs": st.column_config.NumberColumn("Faceoffs"),
+                "win_rate": win_rate_column,
+            },
+        )
+    with cols[1]:
+        st.markdown("#### Faceoff Takers")
+        st.dataframe(
+            player_df,
+            height=650,
+            hide_index=True,
+            column_order=["rank", "playerid_team", "team", "faceoffs", "win_rate"],
+            column_config={
+                "rank": st.column_config.NumberColumn("Rank"),
+                "playerid_team": st.column_config.NumberColumn(
+                    "Player ID", format="%d"
+                ),
+                "team": st.column_config.TextColumn("Team"),
+                "faceoffs": st.column_config.NumberColumn("Faceoffs"),
+                "win_rate": win_rate_column,
+            },
+        )
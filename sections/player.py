@@ -2,14 +2,25 @@ import streamlit as st
 import pandas as pd
 
 from utilities.extract import get_team_logo
-from utilities.plots import plot_rink_chart
+from utilities.plots import RINK_BIN_SIZE, load_rink_summaries, plot_rink_chart
+from utilities.profiling import stage_timer
+from utilities.transform import filter_state, load_player_splits
 
 
 def player_section(faceoff_df: pd.DataFrame, player_df: pd.DataFrame):
 
+    # Every player's splits, computed once per team, dataset & filter selection
+    with stage_timer("load_player_splits", cached=True):
+        splits = load_player_splits(
+            faceoff_df,
+            st.session_state.data_version,
+            st.session_state.selected_teamcode,
+            filter_state(),
+        )
+
     player_agg_df = (
-        faceoff_df.groupby("playerid_team")
-        .agg(faceoffs=("gameID", "count"), wins=("win", "sum"))
+        splits.xs("overall", level="split")[["faceoffs", "wins"]]
+        .droplevel("value")
         .reset_index()
     )
     player_agg_df["win_pct"] = (
@@ -63,14 +74,15 @@ def player_section(faceoff_df: pd.DataFrame, player_df: pd.DataFrame):
         elif len(checked_row) == 0:
             st.error("No player selected")
         else:
-            # Filter to the selected player
+            # Look up the selected player
             selected_player_id = checked_row.iloc[0]["playerid_team"]
-            player_df_sel = faceoff_df[
-                faceoff_df["playerid_team"] == selected_player_id
-            ]
+            player_splits = splits.loc[selected_player_id]
 
-            def win_rate(df):
-                return df["win"].mean() if len(df) > 0 else 0
+            def win_rate(split, value):
+                # Players with no faceoffs in a situation show a 0% win rate
+                if (split, value) not in player_splits.index:
+                    return 0
+                return player_splits.loc[(split, value), "win_rate"]
 
             st.subheader(f"Player ID: {selected_player_id}", divider="gray")
 
@@ -94,49 +106,58 @@ def player_section(faceoff_df: pd.DataFrame, player_df: pd.DataFrame):
                             **Height (in):** {player_row['height']:.0f}  
                             **Weight (lb):** {player_row['weight']:.0f}  
                             **Hand:** {player_row['shoots']}  
-                            **Overall Win Rate:** {win_rate(player_df_sel):.1%}
+                            **Overall Win Rate:** {win_rate("overall", "all"):.1%}
                             """
                     )
 
             # Rink chart
             with top_cols[1]:
-                plot_rink_chart(
-                    faceoff_df[faceoff_df["playerid_team"] == selected_player_id],
-                    height=700,
-                )
+                with stage_timer("load_rink_summaries", cached=True):
+                    _, player_locations = load_rink_summaries(
+                        faceoff_df,
+                        st.session_state.data_version,
+                        st.session_state.selected_teamcode,
+                        filter_state(),
+                        bin_size=(
+                            RINK_BIN_SIZE if st.session_state.rink_binned else None
+                        ),
+                    )
+                plot_rink_chart(player_locations.loc[selected_player_id], height=700)
 
             # --- Bottom Row: Stats Tables ---
             # By Zone
-            zone_wr = player_df_sel.groupby("zone")["win"].mean()
+            zone_wr = player_splits.loc["zone", "win_rate"].rename("win")
+            zone_wr.index.name = "zone"
 
             # By Opponent Handedness
-            hand_wr = player_df_sel.groupby("shoots_opponent")["win"].mean()
+            hand_wr = player_splits.loc["shoots_opponent", "win_rate"].rename("win")
+            hand_wr.index.name = "shoots_opponent"
 
             # By Strength Situation
             strength_wr = pd.DataFrame(
                 {
-                    "Power Play": [
-                        win_rate(player_df_sel[player_df_sel["power_play"] == 1])
-                    ],
-                    "Short Handed": [
-                        win_rate(player_df_sel[player_df_sel["short_handed"] == 1])
-                    ],
+                    "Power Play": [win_rate("power_play", 1)],
+                    "Short Handed": [win_rate("short_handed", 1)],
                 }
             ).T.rename(columns={0: "Win Rate"})
 
             # By Goalie Situation
             goalie_wr = pd.DataFrame(
                 {
-                    "Empty Net": [
-                        win_rate(player_df_sel[player_df_sel["empty_net"] == 1])
-                    ],
-                    "Extra Attacker": [
-                        win_rate(player_df_sel[player_df_sel["extra_attacker"] == 1])
-                    ],
+                    "Empty Net": [win_rate("empty_net", 1)],
+                    "Extra Attacker": [win_rate("extra_attacker", 1)],
                 }
             ).T.rename(columns={0: "Win Rate"})
 
-            # Create bottom row with 4 equal columns
+            # By Location
+            location_wr = pd.DataFrame(
+                {
+                    "Home": [win_rate("home", 1)],
+                    "Away": [win_rate("home", 0)],
+                }
+            ).T.rename(columns={0: "Win Rate"})
+
+            # Create bottom row with 5 equal columns
             with st.container(border=True):
 
                 st.markdown("### Win Rate in Dimensions")
@@ -144,7 +165,7 @@ def player_section(faceoff_df: pd.DataFrame, player_df: pd.DataFrame):
                     f"Quick View on Player {selected_player_id} win rates in different situations."
                 )
 
-                bottom_cols = st.columns(4)
+                bottom_cols = st.columns(5)
 
                 with bottom_cols[0]:
                     zone_wr_df = zone_wr.reset_index()  # Convert Series to DataFrame
@@ -175,3 +196,6 @@ def player_section(faceoff_df: pd.DataFrame, player_df: pd.DataFrame):
 
                 with bottom_cols[3]:
                     st.table(goalie_wr.style.format({"Win Rate": "{:.1%}"}))
+
+                with bottom_cols[4]:
+                    st.table(location_wr.style.format({"Win Rate": "{:.1%}"}))
@@ -1,50 +1,161 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
 import plotly.express as px
 
+from core.aggregates import player_win_rates
+from core.explain import explain_model, explain_predictions
+from core.features import MODEL_FEATURES, SITUATION_COLUMNS, situation_input_df
+from core.model import (
+    BOOSTED_PARAMS,
+    DEFAULT_PARAMS,
+    ENGINE_PARAMS,
+    ENGINES,
+    boosting_rounds,
+    evaluation_curves,
+    predict_faceoff_winners,
+    refresh_faceoff_model,
+    train_faceoff_model,
+)
 from utilities.extract import load_team_codes
-from utilities.transform import (
-    calculate_team_aggregate_win_rates,
-    create_ml_df,
+from utilities.plots import load_evaluation_figures, plot_shap_contributions
+from utilities.recommend import (
+    build_recommendation_table,
+    lookup_recommendation,
+    recommendation_key,
 )
-
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.calibration import calibration_curve
-from sklearn.metrics import (
-    accuracy_score,
-    f1_score,
-    precision_score,
-    recall_score,
-    confusion_matrix,
-    roc_auc_score,
-    RocCurveDisplay,
+from utilities.profiling import mark_cache_miss, stage_timer
+from utilities.registry import (
+    lineage_key,
+    load_or_train,
+    model_fingerprint,
+    save_model,
 )
+from utilities.transform import load_feature_matrix, load_team_win_rates
+from sections.sweep import sweep_section
+
 from statsmodels.stats.outliers_influence import variance_inflation_factor
 
 
+@st.cache_resource(max_entries=16)
+def load_trained_model(
+    fingerprint: str,
+    _X: np.ndarray,
+    _y: np.ndarray,
+    _params: dict,
+    _games: np.ndarray | None = None,
+    _lineage: str | None = None,
+) -> dict:
+    # In-memory layer over the on-disk model registry, shared across sessions.
+    # When the lineage has an earlier model, only the games added since are fit
+    mark_cache_miss()
+    return load_or_train(
+        fingerprint,
+        lambda: train_faceoff_model(_X, _y, _params, _games),
+        lineage=_lineage,
+        update=lambda base: refresh_faceoff_model(base, _X, _y, _params, _games),
+    )
+
+
+# Recommendation tables are built off the script thread so the UI never waits
+recommendation_executor = ThreadPoolExecutor(max_workers=1)
+
+
+@st.cache_resource(max_entries=4)
+def load_recommendation_table(
+    fingerprint: str,
+    roster_key: str,
+    _model,
+    _features: list[str],
+    _player_win_rates: pd.Series,
+    _opponent_win_rates: pd.Series,
+) -> Future:
+    # Submitted once per trained model & roster; every request after it is ready
+    # is a lookup
+    mark_cache_miss()
+    return recommendation_executor.submit(
+        build_recommendation_table,
+        _model,
+        features=_features,
+        player_win_rates=_player_win_rates,
+        opponent_win_rates=_opponent_win_rates,
+    )
+
+
+# SHAP explanations are worked out off the script thread too, one at a time
+explanation_executor = ThreadPoolExecutor(max_workers=1)
+
+
+@st.cache_resource(max_entries=4)
+def load_model_explanation(
+    fingerprint: str, _entry: dict, _features: list[str]
+) -> Future:
+    # Submitted once per trained model
+    mark_cache_miss()
+    return explanation_executor.submit(
+        explain_model, _entry["model"], _entry["X_test"], _features
+    )
+
+
+@st.cache_resource(max_entries=32)
+def load_prediction_explanation(
+    fingerprint: str, situation_key: str, _model, _input_df, _player_ids
+) -> Future:
+    # Submitted once per trained model & game situation
+    mark_cache_miss()
+    return explanation_executor.submit(
+        explain_predictions, _model, _input_df, _player_ids
+    )
+
+
+@st.fragment(run_every=1)
+def rerun_when_done(future: Future):
+    # Polls a background job without blocking the page, and reruns the app to
+    # show its result once it is done
+    if future.done():
+        st.rerun()
+
+
+def engine_params(engine: str) -> dict:
+    # The engine's hyperparameters, as currently set in the parameter inputs
+    return {
+        key: engine if key == "engine" else st.session_state[key]
+        for key in ENGINE_PARAMS[engine]
+    }
+
+
 def prediction_section(faceoff_df: pd.DataFrame):
-    # Get Data for ML Model
-    faceoff_df_ml = create_ml_df()
+    # Team win rates, for the opponent feature & the situation inputs
+    teamcodes_df = load_team_win_rates()
 
     # Model Filters & Params
     with st.expander("Model Features & Parameters", expanded=False):
         with st.form("ml_model_input"):
 
             # Feature Inclusion
-            model_features = [
-                "score_team",
-                "score_diff",
-                "home",
-                "players_diff",
-                "seconds_elapsed__game",
-                "zone__offense",
-                "zone__defense",
-                "playerid_team__win_rate",
-                "opposing_team__win_rate",
-            ]
+            model_features = MODEL_FEATURES
+
+            cols = st.columns([2, 1])
+            with cols[0]:
+                st.selectbox(
+                    "Model Engine",
+                    options=list(ENGINES),
+                    format_func=lambda x: ENGINES[x],
+                    help="Gradient boosting trains on histograms of the features across every core, and stops adding trees once a held out part of the training data stops improving.",
+                    key="engine",
+                )
+            with cols[1]:
+                st.number_input(
+                    label="Learning Rate",
+                    min_value=0.01,
+                    max_value=1.0,
+                    step=0.01,
+                    value=BOOSTED_PARAMS["learning_rate"],
+                    help="Gradient boosting only.",
+                    key="learning_rate",
+                )
 
             cols = st.columns(5)
             with cols[0]:
@@ -53,7 +164,7 @@ def prediction_section(faceoff_df: pd.DataFrame):
                     min_value=1,
                     max_value=10,
                     step=1,
-                    value=4,
+                    value=DEFAULT_PARAMS["max_depth"],
                     key="max_depth",
                 )
             with cols[1]:
@@ -62,7 +173,7 @@ def prediction_section(faceoff_df: pd.DataFrame):
                     min_value=10,
                     max_value=200,
                     step=5,
-                    value=200,
+                    value=DEFAULT_PARAMS["n_estimators"],
                     key="n_estimators",
                 )
             with cols[2]:
@@ -71,7 +182,7 @@ def prediction_section(faceoff_df: pd.DataFrame):
                     min_value=0.01,
                     max_value=0.25,
                     step=0.01,
-                    value=0.1,
+                    value=DEFAULT_PARAMS["min_samples_split"],
                     key="min_samples_split",
                 )
             with cols[3]:
@@ -80,7 +191,7 @@ def prediction_section(faceoff_df: pd.DataFrame):
                     min_value=0.0,
                     max_value=0.2,
                     step=0.01,
-                    value=0.05,
+                    value=DEFAULT_PARAMS["min_samples_leaf"],
                     key="min_samples_leaf",
                 )
             with cols[4]:
@@ -89,52 +200,40 @@ def prediction_section(faceoff_df: pd.DataFrame):
                     min_value=None,
                     max_value=15,
                     step=1,
-                    value=None,
+                    value=DEFAULT_PARAMS["max_features"],
                     key="max_features",
                 )
 
             st.form_submit_button(label="Train Model", type="primary")
 
-    # Trim Columns to Features and Target
-    faceoff_df_ml = faceoff_df_ml[model_features + ["win"]]
+    # Feature matrix, labels & each row's game for the team's unfiltered
+    # faceoffs, built once per dataset version
+    with stage_timer("load_feature_matrix", cached=True):
+        X, y, games = load_feature_matrix(
+            st.session_state.faceoff_df,
+            teamcodes_df,
+            st.session_state.data_version,
+            st.session_state.selected_teamcode,
+            tuple(model_features),
+        )
 
-    # Select features (exclude target 'win')
-    X = faceoff_df_ml.drop(columns=["win"])
-    y = faceoff_df_ml["win"]
+    # Search hyperparameters, promoting the best to the inputs above
+    with st.expander("Hyperparameter Sweep", expanded=False):
+        sweep_section(X, y, features=model_features)
 
-    # Split Data & Fit and Predict Model
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
-    model = RandomForestClassifier(
-        random_state=42,
-        max_depth=st.session_state.max_depth,
-        class_weight="balanced",
-        n_estimators=st.session_state.n_estimators,
-        min_samples_split=st.session_state.min_samples_split,
-        min_samples_leaf=st.session_state.min_samples_leaf,
-        max_features=st.session_state.max_features,
-    )
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
-    y_proba = model.predict_proba(X_test)[:, 1]
+    # Fit the model, or reuse the registered one trained on the same inputs
+    params = engine_params(st.session_state.engine)
+    fingerprint = model_fingerprint(X, y, features=model_features, params=params)
+    lineage = lineage_key([st.session_state.selected_teamcode], model_features, params)
+    with stage_timer("train_model", cached=True):
+        trained = load_trained_model(fingerprint, X, y, params, games, lineage)
+
+    model = trained["model"]
 
     with st.expander("Model Evaluation", expanded=False):
 
         # Evaluation Metrics
-        accuracy = accuracy_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred)
-        precision = precision_score(y_test, y_pred)
-        recall = recall_score(y_test, y_pred)
-        auc = roc_auc_score(y_test, y_proba)
-
-        metrics = {
-            "AUC": auc,
-            "Accuracy": accuracy,
-            "F1 Score": f1,
-            "Precision": precision,
-            "Recall": recall,
-        }
+        metrics = trained["metrics"]
 
         # Create 5 columns side-by-side
         cols = st.columns(len(metrics))
@@ -146,6 +245,64 @@ def prediction_section(faceoff_df: pd.DataFrame):
                     st.metric(label, f"{value:.1%}")
                     st.progress(value)
 
+        st.caption(
+            f"{ENGINES[trained['engine']]} "
+            f"{'updated' if trained.get('update') else 'trained'} "
+            f"in {trained['train_seconds']:.2f}s"
+            + (
+                f", predicting with {boosting_rounds(trained['model'])} rounds."
+                if trained["engine"] == "xgboost"
+                else "."
+            )
+            + (
+                f" {trained['update']['updates']} update(s) since its last full fit "
+                f"added {trained['update']['new_rows']:,} faceoffs from "
+                f"{trained['update']['new_games']:,} new games."
+                if trained.get("update")
+                else ""
+            )
+            + (
+                f" Retrained in full: {trained['retrain_reason']}."
+                if trained.get("retrain_reason")
+                else ""
+            )
+        )
+
+        # Every engine on the same split, with the current parameters
+        if st.toggle("Compare Engines", key="compare_engines"):
+            comparison = []
+            for engine in ENGINES:
+                if engine == trained["engine"]:
+                    engine_trained = trained
+                else:
+                    other_params = engine_params(engine)
+                    engine_trained = load_trained_model(
+                        model_fingerprint(
+                            X, y, features=model_features, params=other_params
+                        ),
+                        X,
+                        y,
+                        other_params,
+                    )
+                comparison.append(
+                    {
+                        "Engine": ENGINES[engine],
+                        **engine_trained["metrics"],
+                        "Training Time (s)": engine_trained["train_seconds"],
+                    }
+                )
+            st.dataframe(
+                pd.DataFrame(comparison),
+                column_config={
+                    **{
+                        label: st.column_config.NumberColumn(format="percent")
+                        for label in metrics
+                    },
+                    "Training Time (s)": st.column_config.NumberColumn(format="%.2f"),
+                },
+                hide_index=True,
+            )
+
         # Check Multicollinearity using VIF
         # vif_data = pd.DataFrame()
         # vif_data["feature"] = X.columns
@@ -160,42 +317,54 @@ def prediction_section(faceoff_df: pd.DataFrame):
         #     y="VIF",
         # )
 
-        chart_cols = st.columns([0.97, 1, 0.8])
-        # Confusion Matrix
-        with chart_cols[0]:
-            cm = confusion_matrix(y_test, y_pred)
-            fig, ax = plt.subplots()
-            sns.heatmap(cm, annot=True, fmt="d", cmap="Blues", ax=ax)
-            ax.set_xlabel("Predicted")
-            ax.set_ylabel("Actual")
-            ax.set_title("Confusion Matrix")
-            st.pyplot(fig)
-
-        # Calibration Plot
-        with chart_cols[1]:
-            prob_true, prob_pred = calibration_curve(y_test, y_proba, n_bins=25)
-            fig2, ax2 = plt.subplots()
-            ax2.plot(prob_pred, prob_true, marker="o")
-            ax2.plot([0, 1], [0, 1], linestyle="--", color="gray")
-            ax2.set_xlabel("Predicted probability")
-            ax2.set_ylabel("True probability")
-            ax2.set_title("Calibration Curve")
-            st.pyplot(fig2)
-
-        # ROC Curve
-        with chart_cols[2]:
-            RocCurveDisplay.from_predictions(y_test, y_proba)
-            plt.title("ROC Curve")
-            st.pyplot(plt.gcf())
+        # Confusion Matrix, Calibration & ROC Curves: arrays computed with the
+        # model, charts built once per model & drawn only when asked for
+        if st.toggle("Show Evaluation Charts", key="show_evaluation_charts"):
+            curves = trained.get("curves") or evaluation_curves(
+                trained["y_test"], trained["y_pred"], trained["y_proba"]
+            )
+            with stage_timer("load_evaluation_figures", cached=True):
+                figures = load_evaluation_figures(fingerprint, curves, metrics["AUC"])
+
+            chart_cols = st.columns(3)
+            for col, name in zip(chart_cols, ["confusion", "calibration", "roc"]):
+                with col:
+                    st.plotly_chart(figures[name], width="stretch")
 
         # Feature Importances
         feat_importances = pd.DataFrame(
-            {"feature": X.columns, "importance": model.feature_importances_}
+            {"feature": model_features, "importance": model.feature_importances_}
         ).sort_values("importance", ascending=False)
 
         st.markdown("### Feature Importances")
         st.bar_chart(feat_importances, x="feature", y="importance")
 
+        # SHAP summary over the test set, from the registry or a background job
+        st.markdown("### SHAP Summary")
+        explanation = trained.get("explanation")
+        if explanation is None:
+            with stage_timer("load_model_explanation", cached=True):
+                explanation_future = load_model_explanation(
+                    fingerprint, trained, model_features
+                )
+            if explanation_future.done():
+                # Saved with the model in the registry (from this thread, not
+                # the job's), so it is only worked out once
+                explanation = explanation_future.result()
+                trained["explanation"] = explanation
+                save_model(fingerprint, trained)
+            else:
+                st.caption("Working out SHAP values for the test set...")
+                rerun_when_done(explanation_future)
+
+        if explanation is not None:
+            st.caption(
+                f"Mean absolute SHAP value of each feature over {len(explanation['X']):,} "
+                f"test faceoffs, in {explanation['scale']}: how far it moves a "
+                "prediction from the average, in either direction."
+            )
+            st.bar_chart(explanation["importance"], x="feature", y="mean_abs_shap")
+
     with st.form("Inputs"):
 
         st.subheader(
@@ -262,80 +431,65 @@ def prediction_section(faceoff_df: pd.DataFrame):
                 key="score_diff",
             )
 
+        st.toggle(
+            "Exact prediction",
+            help="Score this exact situation with the model instead of looking it up in the precomputed table (which buckets elapsed time into 10 minute windows).",
+            key="exact_prediction",
+        )
+
         st.form_submit_button(
             "Who should take this faceoff?", key="determine_faceoff_taker"
         )
 
     # Create Dataframe from Inputs
-    input_data = {
-        key: st.session_state[key]
-        for key in [
-            "home",
-            "players_diff",
-            "seconds_elapsed__game",
-            "zone__offense",
-            "zone__defense",
-            "score_team",
-            "score_diff",
-        ]
-    }
-    input_df = pd.DataFrame([input_data])
-    input_df[["home", "zone__defense", "zone__offense"]] = input_df[
-        ["home", "zone__defense", "zone__offense"]
-    ].astype(int)
-
-    # Get player aggregate data
-    player_agg_df = (
-        faceoff_df.groupby("playerid_team")
-        .agg(faceoffs=("gameID", "count"), wins=("win", "sum"))
-        .reset_index()
-    )
-    player_agg_df["win_pct"] = (
-        player_agg_df["wins"] / player_agg_df["faceoffs"]
-    ).round(3)
-
-    # Merge in Individual Team Player Data
-    input_df = pd.merge(
-        left=input_df,
-        right=player_agg_df[["playerid_team", "win_pct"]],
-        how="cross",
-    )
-    input_df.rename(columns={"win_pct": "playerid_team__win_rate"}, inplace=True)
+    input_data = {key: st.session_state[key] for key in SITUATION_COLUMNS}
 
-    # Get Aggregate Team Win Rates
-    teamcodes_df = pd.DataFrame.from_dict(
-        load_team_codes(), orient="index"
-    ).reset_index(drop=False)
-    teamcodes_df.columns = ["teamname", "teamcode"]
-
-    # Add Aggregate Opponent Win Rate
-    teamcodes_df = calculate_team_aggregate_win_rates(teams_df=teamcodes_df)
+    # Get player aggregate data & the opponent's aggregate win rate
+    player_agg_df = player_win_rates(faceoff_df)
     opposing_team_win_pct = teamcodes_df[
         teamcodes_df["teamcode"] == st.session_state.opponent
     ]["win_rate"].values[0]
-    input_df["opposing_team__win_rate"] = opposing_team_win_pct
 
-    # Trim Columns to Match X
-    playerid_series = input_df["playerid_team"]
-    input_df = input_df[X.columns]
+    input_df, playerid_series = situation_input_df(
+        input_data, player_agg_df, opposing_team_win_pct, features=model_features
+    )
 
     with st.expander("Input Dataframes", expanded=False):
         input_df_to_display = input_df.copy()
         input_df_to_display["playerid"] = playerid_series
         st.dataframe(input_df_to_display)
 
-    # Predict Players & Make DataFrame
-    predictions = model.predict_proba(input_df)
-    predictions_df = pd.DataFrame(predictions)
-
-    # Add Player Info
-    predictions_df["playerid_team"] = playerid_series
-    predictions_df = (
-        predictions_df[["playerid_team", 1]]
-        .rename(columns={1: "Chance to Win"})
-        .sort_values("Chance to Win", ascending=False)
-        .reset_index(drop=True)
-    )
+    # Look up the precomputed recommendation for this situation, from the
+    # registry if the batch pipeline built it, else from a background build
+    roster_win_rates = player_agg_df.set_index("playerid_team")["win_pct"]
+    opponent_win_rates = teamcodes_df.set_index("teamcode")["win_rate"]
+    roster_key = recommendation_key(roster_win_rates, opponent_win_rates)
+    recommendation_table = trained.get("recommendations", {}).get(roster_key)
+    if recommendation_table is None:
+        with stage_timer("load_recommendation_table", cached=True):
+            recommendation_future = load_recommendation_table(
+                fingerprint,
+                roster_key,
+                model,
+                model_features,
+                roster_win_rates,
+                opponent_win_rates,
+            )
+        if recommendation_future.done():
+            recommendation_table = recommendation_future.result()
+
+    predictions_df = None
+    if not st.session_state.exact_prediction and recommendation_table is not None:
+        predictions_df = lookup_recommendation(
+            recommendation_table,
+            situation={**input_data, "opponent": st.session_state.opponent},
+        )
+
+    # Off the grid, table still building, or asked for exact: Predict Players & Make DataFrame
+    if predictions_df is None:
+        with stage_timer("predict_faceoff_winners"):
+            predictions_df = predict_faceoff_winners(model, input_df, playerid_series)
+
     best_players = predictions_df[
         predictions_df["Chance to Win"] == predictions_df["Chance to Win"].max()
     ]
@@ -352,3 +506,40 @@ def prediction_section(faceoff_df: pd.DataFrame):
         },
         hide_index=True,
     )
+
+    # Why a player is recommended: SHAP values of the exact situation
+    st.markdown("#### Why This Player?")
+    with stage_timer("load_prediction_explanation", cached=True):
+        prediction_explanation_future = load_prediction_explanation(
+            fingerprint,
+            json.dumps(
+                [roster_key, input_data, st.session_state.opponent],
+                sort_keys=True,
+                default=str,
+            ),
+            model,
+            input_df,
+            playerid_series,
+        )
+    if not prediction_explanation_future.done():
+        st.caption("Working out why each player is recommended...")
+        rerun_when_done(prediction_explanation_future)
+        return
+
+    prediction_explanation = prediction_explanation_future.result()
+    explained_player = st.selectbox(
+        "Explain the prediction for",
+        options=predictions_df["playerid_team"].tolist(),
+        key="explained_player",
+    )
+    st.caption(
+        f"Starting from the model's average prediction "
+        f"({prediction_explanation['base_value']:.3f} in "
+        f"{prediction_explanation['scale']}), each feature of this situation "
+        "moves the player's chance to win up or down by its SHAP value."
+    )
+    plot_shap_contributions(
+        prediction_explanation["contributions"].loc[explained_player],
+        prediction_explanation["inputs"].loc[explained_player],
+        scale=prediction_explanation["scale"],
+    )
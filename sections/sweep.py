@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import streamlit as st
+import pandas as pd
+
+from core.model import DEFAULT_PARAMS
+from core.sweep import PARAM_GRID, config_key, grid_configs, run_sweep
+from utilities.registry import load_sweep_scores, model_fingerprint, save_sweep_scores
+
+PARAM_LABELS = {
+    "max_depth": "Max Depth",
+    "n_estimators": "N-Estimators",
+    "min_samples_split": "Min Samples Split",
+    "min_samples_leaf": "Min Samples Leaf",
+    "max_features": "Max Features",
+}
+
+
+def promote_config(params: dict):
+    # Runs before the rerun, so the model parameter inputs pick these up and
+    # the promoted configuration is trained as the active model (sweeps tune
+    # the forest)
+    st.session_state["engine"] = "random_forest"
+    for key, value in params.items():
+        st.session_state[key] = value
+
+
+def sweep_section(X: np.ndarray, y: np.ndarray, features: list[str]):
+    """Parameter sweep over the feature matrix & labels of `load_feature_matrix`."""
+
+    with st.form("sweep_form"):
+        st.caption(
+            "Cross-validate every combination of the selected values. Scores are "
+            "saved, so only new combinations are trained."
+        )
+
+        cols = st.columns(len(PARAM_GRID) + 1)
+        for col, (param, values) in zip(cols, PARAM_GRID.items()):
+            with col:
+                st.multiselect(
+                    PARAM_LABELS[param],
+                    options=values,
+                    default=values if param == "max_depth" else [DEFAULT_PARAMS[param]],
+                    format_func=lambda x: "All" if x is None else f"{x}",
+                    key=f"sweep__{param}",
+                )
+        with cols[-1]:
+            st.number_input(
+                "Folds", min_value=3, max_value=10, value=5, key="sweep_folds"
+            )
+
+        submitted = st.form_submit_button("Run Sweep")
+
+    # Scores are recorded per training set & number of folds
+    folds = st.session_state.sweep_folds
+    data_key = model_fingerprint(X, y, features=features, params={"cv_folds": folds})
+    scores = load_sweep_scores(data_key)
+
+    if submitted:
+        configs = grid_configs(
+            {param: st.session_state[f"sweep__{param}"] for param in PARAM_GRID}
+        )
+        pending = [params for params in configs if config_key(params) not in scores]
+
+        progress = st.progress(0.0, text=f"Cross-validating {len(pending)} models...")
+
+        def record(params, result):
+            # Saved as each finishes, so an interrupted sweep keeps its scores
+            scores[config_key(params)] = result
+            save_sweep_scores(data_key, scores)
+            done = len(configs) - sum(config_key(p) not in scores for p in pending)
+            progress.progress(done / len(configs))
+
+        run_sweep(X, y, pending, folds=folds, on_result=record)
+        progress.empty()
+
+    if scores == {}:
+        st.info("No configurations have been cross-validated on this data yet.")
+        return
+
+    # Browse results, best first
+    ranked = sorted(scores, key=lambda key: scores[key]["auc"], reverse=True)
+    results_df = pd.DataFrame([{**json.loads(key), **scores[key]} for key in ranked])
+    selection = st.dataframe(
+        results_df,
+        column_config={
+            **{param: PARAM_LABELS[param] for param in PARAM_GRID},
+            "auc": st.column_config.ProgressColumn(f"{folds}-Fold AUC"),
+            "auc_std": st.column_config.NumberColumn("AUC Std", format="%.3f"),
+            "accuracy": st.column_config.ProgressColumn("Accuracy"),
+        },
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key="sweep_results",
+    )
+
+    selected_rows = selection.selection.rows
+    st.button(
+        "Promote to Active Model",
+        disabled=selected_rows == [],
+        on_click=promote_config,
+        args=(json.loads(ranked[selected_rows[0]]) if selected_rows else {},),
+        help="Train the selected configuration on the 80/20 split and use it for recommendations.",
+    )
@@ -1,10 +1,13 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utilities.plots import plot_rink_chart
+from utilities.plots import RINK_BIN_SIZE, load_rink_summaries, plot_rink_chart
+from core.filters import summarize_cube
+from utilities.profiling import stage_timer
+from utilities.transform import filter_state, session_filters
 
 
-def team_section(faceoff_df: pd.DataFrame):
+def team_section(faceoff_df: pd.DataFrame, summary_cube: tuple[pd.DataFrame, dict]):
 
     st.subheader("Team Summary", divider="gray")
 
@@ -40,7 +43,20 @@ def team_section(faceoff_df: pd.DataFrame):
 
     with cols[1]:
         # Plot Rink Chart
-        plot_rink_chart(df=faceoff_df, height=800)
+        binned = st.toggle(
+            "Bin Locations",
+            help=f"Group faceoff locations into {RINK_BIN_SIZE}ft squares.",
+            key="rink_binned",
+        )
+        with stage_timer("load_rink_summaries", cached=True):
+            team_locations, _ = load_rink_summaries(
+                faceoff_df,
+                st.session_state.data_version,
+                st.session_state.selected_teamcode,
+                filter_state(),
+                bin_size=RINK_BIN_SIZE if binned else None,
+            )
+        plot_rink_chart(team_locations, height=800)
 
     ## ------------------------------------------------------------------ ##
     ## TABLE EXPANDER
@@ -70,13 +86,11 @@ def team_section(faceoff_df: pd.DataFrame):
                 "Please select at least one dimension to display the summary table."
             )
         else:
-            # Calculate Win Percentage by Dimensions
-            summary_df = (
-                faceoff_df.groupby(dimensions)
-                .agg(faceoffs=("gameID", "count"), wins=("win", "sum"))
-                .reset_index()
+            # Calculate Win Percentage by Dimensions from the pre-aggregated cube
+            cube, cube_masks = summary_cube
+            summary_df = summarize_cube(
+                cube, dimensions, session_filters(), masks=cube_masks
             )
-            summary_df["win_pct"] = summary_df["wins"] / summary_df["faceoffs"]
 
             # Show Dataframe
             st.dataframe(
@@ -3,17 +3,17 @@ import pandas as pd
 import plotly.express as px
 
 # Import modules
-from utilities.global_setup import setup_app, page_footer
+from utilities.global_setup import setup_app, page_footer, performance_panel
 from utilities.extract import get_team_logo, load_team_codes
-from utilities.transform import (
-    filter_faceoff_df,
-    faceoff_cleaning,
-    player_cleaning,
-)
+from core.cleaning import select_team_faceoffs
+from core.filters import filter_faceoff_df
+from utilities.profiling import finish_run, stage_timer, start_run
+from utilities.transform import load_filter_masks, load_summary_cube, session_filters
 
 from sections.team import team_section
 from sections.player import player_section
 from sections.prediction import prediction_section
+from sections.league import league_section
 
 
 def main():
@@ -32,41 +32,19 @@ def main():
     )
 
     # Setup the app
-    setup_app()
+    with stage_timer("setup_app"):
+        setup_app()
 
-    # Clean the faceoff data
-    faceoff_df = faceoff_cleaning(
-        st.session_state.faceoffs_df__raw,
-        team_of_interest=st.session_state.selected_teamcode,
-    )
-
-    # Clean the player data
-    player_df = player_cleaning(
-        st.session_state.player_df__raw,
-    )
+    # Slice the selected team out of the cleaned league faceoff data, which
+    # already has player info mapped in
+    with stage_timer("select_team_faceoffs"):
+        faceoff_df = select_team_faceoffs(
+            st.session_state.faceoff_df__league,
+            team=st.session_state.selected_teamcode,
+        )
 
-    # Map Player Info into FaceOff Data
-    faceoff_df = pd.merge(
-        left=faceoff_df,
-        right=player_df.rename(
-            columns={
-                col: f"{col}_team" for col in player_df.columns if col != "playerid"
-            }
-        ).rename(columns={"playerid": "playerid_team"}),
-        on="playerid_team",
-        copy=False,
-        how="inner",
-    )
-    faceoff_df = pd.merge(
-        left=faceoff_df,
-        right=player_df.rename(
-            columns={
-                col: f"{col}_opponent" for col in player_df.columns if col != "playerid"
-            }
-        ).rename(columns={"playerid": "playerid_opponent"}),
-        on="playerid_opponent",
-        how="inner",
-    )
+    # Cleaned player data
+    player_df = st.session_state.player_df__clean
 
     # Load cleaned data into session state
     st.session_state["faceoff_df"], st.session_state["player_df"] = (
@@ -94,7 +72,9 @@ def main():
     ## ------------------------------------------------------------------ ##
     ## CREATE TABS
     ## ------------------------------------------------------------------ ##
-    summary_tab, predict_tab = st.tabs(["Summary", "Recommendation Engine"])
+    summary_tab, predict_tab, league_tab = st.tabs(
+        ["Summary", "Recommendation Engine", "League Leaderboard"]
+    )
 
     with summary_tab:
 
@@ -201,22 +181,53 @@ def main():
 
                 submitted = st.form_submit_button("Apply Filters")
 
-        faceoff_df = filter_faceoff_df(faceoff_df)
+        # Summary cube over the unfiltered team data; filters slice it later
+        with stage_timer("load_summary_cube", cached=True):
+            summary_cube = load_summary_cube(
+                faceoff_df,
+                st.session_state.data_version,
+                st.session_state.selected_teamcode,
+            )
+
+        with stage_timer("load_filter_masks", cached=True):
+            masks = load_filter_masks(
+                faceoff_df,
+                st.session_state.data_version,
+                st.session_state.selected_teamcode,
+            )
+
+        with stage_timer("filter_faceoff_df"):
+            faceoff_df = filter_faceoff_df(faceoff_df, session_filters(), masks=masks)
 
         ## ------------------------------------------------------------------ ##
         ## TEAM & PLAYER METRICS AND CHARTs
         ## ------------------------------------------------------------------ ##
 
-        team_section(faceoff_df=faceoff_df)
-        player_section(faceoff_df=faceoff_df, player_df=player_df)
+        with stage_timer("team_section"):
+            team_section(faceoff_df=faceoff_df, summary_cube=summary_cube)
+        with stage_timer("player_section"):
+            player_section(faceoff_df=faceoff_df, player_df=player_df)
 
     ## ---------------------------------------------------------------------------------------------------- ##
     ## ---------------------------------------------------------------------------------------------------- ##
 
     with predict_tab:
-        prediction_section(faceoff_df=faceoff_df)
+        with stage_timer("prediction_section"):
+            prediction_section(faceoff_df=faceoff_df)
+
+    with league_tab:
+        with stage_timer("league_section"):
+            league_section()
 
 
 if __name__ == "__main__":
+    # Every rerun is timed stage by stage and logged as one JSON line
+    start_run()
     main()
     page_footer()
+    performance_panel(
+        finish_run(
+            team=st.session_state.get("selected_teamcode"),
+            data_version=st.session_state.get("data_version"),
+        )
+    )
@@ -0,0 +1,118 @@
+import argparse
+import os
+import urllib.request
+
+import pandas as pd
+
+from utilities.cache import temp_path
+
+# Remote assets are fetched into Streamlit's static folder (served at
+# app/static/ with `enableStaticServing`) ahead of time or in the background,
+# so renders never wait on a CDN and the app keeps working offline once the
+# cache is filled. Renders use the remote URL of an asset not cached yet.
+STATIC_DIR = "static"
+ASSET_DIR = os.path.join(STATIC_DIR, "assets")
+
+ASSET_URLS = {
+    "rink.jpg": "https://st4.depositphotos.com/15640006/19621/v/450/depositphotos_196215850-stock-illustration-detailed-illustration-icehockey-rink-field.jpg",
+    "nhl_shield.png": "https://media.d3.nhle.com/image/private/t_q-best/prd/assets/nhl/logos/nhl_shield_wm_on_dark_fqkbph",
+}
+LOGO_URL = "https://assets.nhle.com/logos/nhl/svg/{}_dark.svg"
+
+# Assets that could not be downloaded, which are not tried again this process
+_failed_downloads = set()
+
+
+def logo_filename(team_code: str) -> str:
+    return os.path.join("logos", f"{team_code}_dark.svg")
+
+
+def all_assets(team_codes: list[str]) -> dict[str, str]:
+    """Remote URL of the app's images and every team's logo, by filename."""
+    assets = dict(ASSET_URLS)
+    for team_code in team_codes:
+        assets[logo_filename(team_code)] = LOGO_URL.format(team_code)
+    return assets
+
+
+def fetch_asset(
+    filename: str,
+    url: str,
+    asset_dir: str = ASSET_DIR,
+    timeout: float = 5,
+    retry: bool = False,
+) -> str | None:
+    """Local path of an asset, downloading it if it is not cached yet.
+
+    Returns None if the asset is not cached and cannot be downloaded. A failed
+    download is only tried again with `retry`.
+    """
+    path = os.path.join(asset_dir, filename)
+    if os.path.exists(path):
+        return path
+    if filename in _failed_downloads and not retry:
+        return None
+
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            content = response.read()
+    except OSError:
+        _failed_downloads.add(filename)
+        return None
+    _failed_downloads.discard(filename)
+
+    tmp_path = temp_path(os.path.dirname(path))
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+    return path
+
+
+def static_url(filename: str) -> str:
+    """URL of a cached asset under Streamlit's static file serving."""
+    relpath = os.path.relpath(os.path.join(ASSET_DIR, filename), STATIC_DIR)
+    return f"app/static/{relpath.replace(os.sep, '/')}"
+
+
+def prefetch_assets(
+    team_codes: list[str], timeout: float = 5, retry: bool = False
+) -> list[str]:
+    """Download every asset not cached yet, returning those that failed."""
+    return [
+        filename
+        for filename, url in all_assets(team_codes).items()
+        if fetch_asset(filename, url, timeout=timeout, retry=retry) is None
+    ]
+
+
+def asset_url(filename: str) -> str:
+    """Static URL of a cached asset, or its remote URL. Never downloads."""
+    if os.path.exists(os.path.join(ASSET_DIR, filename)):
+        return static_url(filename)
+    return ASSET_URLS[filename]
+
+
+def team_logo(team_code: str) -> str:
+    """Local path of a cached team logo, or its remote URL. Never downloads."""
+    path = os.path.join(ASSET_DIR, logo_filename(team_code))
+    return path if os.path.exists(path) else LOGO_URL.format(team_code)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Download the app's images and every team logo ahead of time."
+    )
+    parser.add_argument("--teamcodes", default="data/nhl_teamcodes.csv")
+    args = parser.parse_args()
+
+    team_codes = list(pd.read_csv(args.teamcodes)["TeamCode"])
+    n_assets = len(all_assets(team_codes))
+    missing = prefetch_assets(team_codes, timeout=30, retry=True)
+    print(f"Cached {n_assets - len(missing)} of {n_assets} assets in {ASSET_DIR}")
+    for filename in missing:
+        print(f"  could not download {filename}")
+
+
+if __name__ == "__main__":
+    main()
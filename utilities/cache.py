@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow.feather as feather
+
+CACHE_DIR = "data/cache"
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def coerce_column_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Give every column a single Arrow-compatible type.
+
+    Excel sheets frequently mix ints and strings in one column (e.g. a period
+    column holding 1, 2, 3 and "OT"); those columns are stored as strings,
+    keeping missing values missing.
+    """
+    for col in df.columns[df.dtypes == object]:
+        values = df[col].dropna()
+        if not values.map(type).eq(str).all():
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def _source_stem(source: str) -> str:
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+def _manifest_path(source: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, f"{_source_stem(source)}.json")
+
+
+def _read_manifest(source: str, cache_dir: str) -> dict | None:
+    try:
+        with open(_manifest_path(source, cache_dir)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def temp_path(directory: str) -> str:
+    """A new temporary file in `directory`, to write and then os.replace.
+
+    Every writer gets a file of its own next to the target, so concurrent
+    sessions or processes never write into the same one.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+        return f.name
+
+
+def _write_json_atomic(path: str, payload: dict):
+    tmp_path = temp_path(os.path.dirname(path))
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _validated_manifest(source: str, cache_dir: str) -> dict | None:
+    """The cache manifest, if it still describes the workbook on disk.
+
+    An unchanged mtime/size is trusted outright; a touched-but-identical
+    file is detected by its hash and the manifest's stat key refreshed.
+    """
+    manifest = _read_manifest(source, cache_dir)
+    if manifest is None:
+        return None
+
+    stat = os.stat(source)
+    if manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size:
+        return manifest
+    if manifest["sha256"] == file_sha256(source):
+        manifest.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        _write_json_atomic(_manifest_path(source, cache_dir), manifest)
+        return manifest
+    return None
+
+
+def workbook_version(source: str, cache_dir: str = CACHE_DIR) -> str:
+    """Content hash of the workbook, without re-hashing an unchanged file."""
+    manifest = _validated_manifest(source, cache_dir)
+    return manifest["sha256"] if manifest else file_sha256(source)
+
+
+def read_excel_cached(
+    source: str, sheet_names: list[str], cache_dir: str = CACHE_DIR
+) -> dict[str, pd.DataFrame]:
+    """Read sheets from an Excel workbook through an Arrow IPC cache.
+
+    The cache is keyed on the workbook's mtime/size and content hash, so only
+    a real content change re-parses the workbook. Cached sheets are
+    uncompressed Arrow IPC files so they can be memory-mapped rather than
+    parsed.
+    """
+    manifest = _validated_manifest(source, cache_dir)
+
+    if manifest is not None and set(sheet_names) <= set(manifest["sheets"]):
+        sheet_paths = {
+            sheet: os.path.join(cache_dir, manifest["sheets"][sheet])
+            for sheet in sheet_names
+        }
+        if all(os.path.exists(path) for path in sheet_paths.values()):
+            return {
+                sheet: feather.read_table(path, memory_map=True).to_pandas()
+                for sheet, path in sheet_paths.items()
+            }
+
+    # Cache miss: parse the workbook once for all sheets and rebuild the cache
+    stat = os.stat(source)
+    sha256 = file_sha256(source)
+    sheets = pd.read_excel(source, sheet_name=sheet_names)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = {
+        "source": source,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+        "sheets": {},
+    }
+    for sheet, df in sheets.items():
+        df = coerce_column_types(df)
+        filename = f"{_source_stem(source)}__{sha256[:16]}__{sheet}.arrow"
+        tmp_path = temp_path(cache_dir)
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, os.path.join(cache_dir, filename))
+        manifest["sheets"][sheet] = filename
+        sheets[sheet] = df
+    _write_json_atomic(_manifest_path(source, cache_dir), manifest)
+
+    # Drop sheets cached from earlier versions of this workbook
+    for filename in os.listdir(cache_dir):
+        if (
+            filename.startswith(f"{_source_stem(source)}__")
+            and filename not in manifest["sheets"].values()
+        ):
+            os.remove(os.path.join(cache_dir, filename))
+
+    return sheets
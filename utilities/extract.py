@@ -1,25 +1,46 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
 
+from core.cleaning import read_team_codes
+from utilities.assets import asset_url, prefetch_assets, team_logo
+from utilities.profiling import mark_cache_miss
+from utilities.store import STORE_DIR, read_store
+
+DATA_PATH = "data/Data Analyst Faceoff Project Data.xlsx"
+
 
 @st.cache_resource(ttl=600)
 def load_team_codes() -> pd.DataFrame:
-    teamcode_df = pd.read_csv("data/nhl_teamcodes.csv").to_dict(orient="records")
-    teamcode_dict = {team["TeamName"]: team["TeamCode"] for team in teamcode_df}
-    return teamcode_dict
+    return read_team_codes()
+
+
+# Assets are downloaded off the script thread, so no render waits on a CDN
+asset_executor = ThreadPoolExecutor(max_workers=1)
+
+
+@st.cache_resource
+def start_asset_prefetch() -> Future:
+    # Once per server process: every team logo & image not cached yet
+    return asset_executor.submit(prefetch_assets, list(read_team_codes().values()))
 
 
-@st.cache_resource(ttl=600)
 def get_team_logo(team_code: str) -> str:
-    return "https://assets.nhle.com/logos/nhl/svg/{}_dark.svg".format(team_code)
-
-
-@st.cache_data(ttl=600)
-def load_data() -> tuple[pd.DataFrame, pd.DataFrame]:
-    faceoffs_df = pd.read_excel(
-        "data/Data Analyst Faceoff Project Data.xlsx", sheet_name="NHLFaceOffs"
-    )
-    player_df = pd.read_excel(
-        "data/Data Analyst Faceoff Project Data.xlsx", sheet_name="PlayerInfo"
-    )
-    return faceoffs_df, player_df
+    # Served from the local asset cache, falling back to the NHL CDN until the
+    # prefetch has downloaded it
+    return team_logo(team_code)
+
+
+def get_asset_url(filename: str) -> str:
+    return asset_url(filename)
+
+
+@st.cache_resource(max_entries=2)
+def load_data(
+    data_version: str, seasons: tuple[int, ...] | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    # Cleaned league faceoffs & players from the partitioned store, read once
+    # per store version and shared read-only across sessions
+    mark_cache_miss()
+    return read_store(STORE_DIR, seasons=seasons)
@@ -1,5 +1,7 @@
-import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 
 
 def transform_MMSS_to_seconds(time_str: str) -> int:
@@ -13,3 +15,46 @@ def height_to_inches(h):
         return int(feet) * 12 + int(inches)
     except:
         return None
+
+
+def _extract_int_groups(series: pd.Series, pattern: str) -> list[np.ndarray]:
+    """Extract the named integer groups of `pattern` from every row at once.
+
+    The regex runs inside Arrow, so there is no Python call per row. Rows that
+    are missing or do not match come back as NaN.
+    """
+    try:
+        values = pa.array(series, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        values = pa.array(
+            series.astype(str).where(series.notna()), type=pa.string(), from_pandas=True
+        )
+    matches = pc.extract_regex(values, pattern)
+    return [
+        pc.cast(pc.struct_field(matches, [i]), pa.float64()).to_numpy(
+            zero_copy_only=False
+        )
+        for i in range(matches.type.num_fields)
+    ]
+
+
+def _to_int_if_complete(values: np.ndarray, index: pd.Index) -> pd.Series:
+    # Keep integer columns integer unless a bad value forced a NaN in
+    series = pd.Series(values, index=index)
+    return series if series.isna().any() else series.astype(int)
+
+
+def series_MMSS_to_seconds(time_series: pd.Series) -> pd.Series:
+    """Vectorized `transform_MMSS_to_seconds`; unparseable clocks become NaN."""
+    minutes, seconds = _extract_int_groups(
+        time_series, r"^\s*(?P<minutes>\d+):(?P<seconds>\d+)\s*$"
+    )
+    return _to_int_if_complete(minutes * 60 + seconds, time_series.index)
+
+
+def series_height_to_inches(height_series: pd.Series) -> pd.Series:
+    """Vectorized `height_to_inches`; unparseable heights become NaN."""
+    feet, inches = _extract_int_groups(
+        height_series, r"^\s*(?P<feet>\d+)'\s*(?P<inches>\d+)\s*$"
+    )
+    return _to_int_if_complete(feet * 12 + inches, height_series.index)
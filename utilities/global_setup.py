@@ -1,6 +1,26 @@
+import os
 import streamlit as st
 import pandas as pd
-from utilities.extract import get_team_logo, load_data, load_team_codes
+from utilities.cache import workbook_version
+from utilities.extract import (
+    DATA_PATH,
+    get_asset_url,
+    get_team_logo,
+    load_data,
+    load_team_codes,
+    start_asset_prefetch,
+)
+from utilities.ingest import ingest_workbook
+from utilities.profiling import mark_cache_miss, stage_timer
+from utilities.store import store_version
+from utilities.transform import load_team_perspective_df
+
+
+@st.cache_resource(show_spinner="Ingesting new games...")
+def ingest_workbook_version(version: str) -> list[str]:
+    # Runs once per workbook version, however many sessions are open
+    mark_cache_miss()
+    return ingest_workbook(DATA_PATH)
 
 
 def setup_app():
@@ -13,7 +33,8 @@ def setup_app():
         page_icon="🏒",
     )
 
-    # Load team code mapping
+    # Download logos & images in the background, then load team code mapping
+    start_asset_prefetch()
     teamcode_mapping = load_team_codes()
 
     # Sidebar for team selection
@@ -53,6 +74,12 @@ def setup_app():
             )
             submitted = st.form_submit_button("Load Team", type="primary")
 
+        st.toggle(
+            "Show Performance",
+            help="Time, memory and cache use of each stage of the last run.",
+            key="show_performance",
+        )
+
         st.markdown("*Built by **Benjamin Hoyle** (November 2025)*")
 
     # Set team name and code
@@ -64,11 +91,53 @@ def setup_app():
         size="large",
     )
 
+    # Bring the data store up to date with the workbook
+    if os.path.exists(DATA_PATH):
+        with stage_timer("ingest_workbook", cached=True):
+            ingest_workbook_version(workbook_version(DATA_PATH))
+
     # Load and cache data, and add to session state
-    faceoffs_df, player_df = load_data()
+    data_version = store_version()
+    with stage_timer("load_data", cached=True):
+        faceoffs_df, player_df = load_data(data_version)
+
+    st.session_state["faceoffs_df__clean"] = faceoffs_df
+    st.session_state["player_df__clean"] = player_df
+    st.session_state["data_version"] = data_version
+
+    # League-wide faceoffs from every team's perspective with player info,
+    # cleaned once per dataset
+    with stage_timer("load_team_perspective_df", cached=True):
+        st.session_state["faceoff_df__league"] = load_team_perspective_df(
+            faceoffs_df, player_df, data_version
+        )
+
 
-    st.session_state["faceoffs_df__raw"] = faceoffs_df
-    st.session_state["player_df__raw"] = player_df
+def performance_panel(run: dict | None):
+
+    # Stages of the run just finished, nested stages indented under their parent
+    if run is None or not st.session_state.get("show_performance", False):
+        return
+
+    with st.sidebar:
+        st.markdown(f"#### Performance ({run['seconds']:.2f}s)")
+        stages_df = pd.DataFrame(run["stages"])
+        stages_df["stage"] = [
+            "\u2003" * depth + stage
+            for stage, depth in zip(stages_df["stage"], stages_df["depth"])
+        ]
+        st.dataframe(
+            stages_df.reindex(columns=["stage", "seconds", "peak_growth_mb", "cache"]),
+            column_config={
+                "stage": "Stage",
+                "seconds": st.column_config.NumberColumn("Seconds", format="%.3f"),
+                "peak_growth_mb": st.column_config.NumberColumn(
+                    "Peak +MB", format="%.1f"
+                ),
+                "cache": "Cache",
+            },
+            hide_index=True,
+        )
 
 
 def page_footer():
@@ -79,9 +148,9 @@ def page_footer():
 
     with cols[1]:
         st.markdown(
-            """
+            f"""
             <div style="display: flex; align-items: center; justify-content: center; gap: 15px;">
-                <img src="https://media.d3.nhle.com/image/private/t_q-best/prd/assets/nhl/logos/nhl_shield_wm_on_dark_fqkbph"
+                <img src="{get_asset_url('nhl_shield.png')}"
                     style="height:25px;"/>
                 <p style="margin: 0; font-size: 0.9rem;">
                     | &nbsp;&nbsp;&nbsp; Developed by <strong>Benjamin Hoyle</strong> |
@@ -0,0 +1,124 @@
+"""Ingest faceoff workbooks into the partitioned data store.
+
+Run from the repository root, e.g. after each night's games:
+
+    python -m utilities.ingest "data/Data Analyst Faceoff Project Data.xlsx"
+
+Faceoff sheets are streamed and cleaned in chunks, so memory use is bounded
+by `--chunk-rows` rather than the size of the workbook.
+"""
+
+import argparse
+import itertools
+from collections.abc import Iterable, Iterator
+
+import openpyxl
+import pandas as pd
+
+from core.cleaning import faceoff_league_cleaning, player_cleaning, read_team_codes
+from utilities.cache import read_excel_cached, workbook_version
+from utilities.store import (
+    STORE_DIR,
+    append_faceoff_chunks,
+    read_manifest,
+    read_raw_players,
+    write_players,
+)
+
+# Faceoff rows read, cleaned & written at a time
+CHUNK_ROWS = 100_000
+
+
+def read_sheet_chunks(
+    path: str, sheet_name: str, chunk_rows: int = CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """Stream a workbook sheet as DataFrames of up to `chunk_rows` rows.
+
+    The workbook is opened read-only, so rows are parsed as they are read
+    rather than the whole sheet being loaded first.
+    """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = next(rows)
+        # Formatted but empty rows at the end of a sheet read as all None
+        rows = (row for row in rows if any(value is not None for value in row))
+        for chunk in iter(lambda: list(itertools.islice(rows, chunk_rows)), []):
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def clean_faceoff_chunks(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    # Team codes are read once for the whole stream
+    teamcodes = read_team_codes()
+    for chunk in chunks:
+        yield faceoff_league_cleaning(chunk, teamcodes)
+
+
+def ingest_players(player_df: pd.DataFrame, store_dir: str = STORE_DIR):
+
+    # Players: newest sheet wins, and the whole table is re-cleaned so the
+    # median/mode fills match cleaning every player at once
+    stored_players = read_raw_players(store_dir)
+    if stored_players is not None:
+        playerid = next(col for col in player_df.columns if col.lower() == "playerid")
+        player_df = pd.concat([stored_players, player_df]).drop_duplicates(
+            playerid, keep="last"
+        )
+    write_players(player_df, player_cleaning(player_df.copy()), store_dir)
+
+
+def ingest_sheets(
+    faceoffs_df: pd.DataFrame,
+    player_df: pd.DataFrame,
+    store_dir: str = STORE_DIR,
+    source: dict | None = None,
+) -> list[str]:
+    """Clean raw faceoff/player sheets and append any new games to the store."""
+    ingest_players(player_df, store_dir)
+
+    # Faceoffs: only games missing from the store are written
+    return append_faceoff_chunks(clean_faceoff_chunks([faceoffs_df]), store_dir, source)
+
+
+def ingest_workbook(
+    path: str, store_dir: str = STORE_DIR, chunk_rows: int = CHUNK_ROWS
+) -> list[str]:
+    """Ingest a workbook, skipping it entirely if this version was seen before.
+
+    The (small) player sheet is read whole, through the Arrow cache; the
+    faceoff sheet is streamed through cleaning & into the store in chunks.
+    """
+    version = workbook_version(path)
+    if read_manifest(store_dir)["sources"].get(path) == version:
+        return []
+
+    ingest_players(
+        read_excel_cached(path, sheet_names=["PlayerInfo"])["PlayerInfo"], store_dir
+    )
+    return append_faceoff_chunks(
+        clean_faceoff_chunks(read_sheet_chunks(path, "NHLFaceOffs", chunk_rows)),
+        store_dir,
+        source={"path": path, "version": version},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest faceoff workbooks.")
+    parser.add_argument("workbooks", nargs="+", help="Workbook(s) to ingest")
+    parser.add_argument("--store", default=STORE_DIR, help="Store directory")
+    parser.add_argument(
+        "--chunk-rows", type=int, default=CHUNK_ROWS, help="Faceoff rows per chunk"
+    )
+    args = parser.parse_args()
+
+    for path in args.workbooks:
+        written = ingest_workbook(path, args.store, args.chunk_rows)
+        print(f"{path}: {len(written)} new partition(s)")
+        for partition in written:
+            print(f"  {partition}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,60 @@ import pandas as pd
 import numpy as np
 
 import plotly.express as px
+import plotly.graph_objects as go
 
+from utilities.extract import get_asset_url
+from utilities.profiling import mark_cache_miss
 
-def plot_rink_chart(df: pd.DataFrame, height: int = 800):
+# Grid used when locations are binned, in feet
+RINK_BIN_SIZE = 10
 
-    # Aggregate by location
-    location_summary = (
-        df.groupby(["x", "y"])
-        .agg(faceoffs=("win", "count"), win_pct=("win", "mean"))
-        .reset_index()
+# Charts with more points than this are drawn with WebGL rather than SVG, and
+# lose their per-point text labels
+WEBGL_MIN_POINTS = 250
+
+
+def build_rink_summaries(
+    df: pd.DataFrame, bin_size: int | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Faceoffs and wins per rink location, for the team and for every player.
+
+    The player table is indexed by (playerid_team, x, y) and the team table,
+    rolled up from it, by (x, y). With `bin_size` locations are snapped to the
+    centre of a square grid of that size.
+    """
+    x, y = df["x"], df["y"]
+    if bin_size:
+        x = (np.floor(x / bin_size) + 0.5) * bin_size
+        y = (np.floor(y / bin_size) + 0.5) * bin_size
+
+    players = df.groupby([df["playerid_team"], x, y]).agg(
+        faceoffs=("win", "count"), wins=("win", "sum")
+    )
+    team = players.groupby(level=["x", "y"]).sum()
+
+    return team, players
+
+
+@st.cache_resource(max_entries=16)
+def load_rink_summaries(
+    _df: pd.DataFrame, data_version: str, team: str, filters: tuple, bin_size: int
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    mark_cache_miss()
+    return build_rink_summaries(_df, bin_size=bin_size)
+
+
+def plot_rink_chart(location_df: pd.DataFrame, height: int = 800):
+
+    # Win rate & labels by location
+    location_summary = location_df.reset_index()
+    location_summary["win_pct"] = (
+        location_summary["wins"] / location_summary["faceoffs"]
+    )
+    location_summary["label"] = np.char.mod(
+        "%.1f%%", location_summary["win_pct"].to_numpy() * 100
     )
-    location_summary["label"] = location_summary["win_pct"].apply(lambda x: f"{x:.1%}")
+    webgl = len(location_summary) > WEBGL_MIN_POINTS
 
     # Create scatter plot
     fig = px.scatter(
@@ -30,7 +73,8 @@ def plot_rink_chart(df: pd.DataFrame, height: int = 800):
             "y": False,
         },
         size_max=75,
-        text="label",
+        text=None if webgl else "label",
+        render_mode="webgl" if webgl else "svg",
     )
 
     # Add rink background image
@@ -54,7 +98,7 @@ def plot_rink_chart(df: pd.DataFrame, height: int = 800):
         coloraxis_colorbar=dict(title="Win Percentage"),
         images=[
             dict(
-                source="https://st4.depositphotos.com/15640006/19621/v/450/depositphotos_196215850-stock-illustration-detailed-illustration-icehockey-rink-field.jpg",
+                source=get_asset_url("rink.jpg"),
                 xref="x",
                 yref="y",
                 x=-125,
@@ -75,3 +119,94 @@ def plot_rink_chart(df: pd.DataFrame, height: int = 800):
     )
 
     return st.plotly_chart(fig, use_container_width=False)
+
+
+def build_evaluation_figures(curves: dict, auc: float) -> dict[str, go.Figure]:
+    """Confusion matrix, calibration & ROC charts from `evaluation_curves`."""
+    layout = dict(height=350, margin=dict(l=0, r=0, t=40, b=0), showlegend=False)
+    diagonal = go.Scatter(
+        x=[0, 1], y=[0, 1], mode="lines", line=dict(dash="dash", color="gray")
+    )
+
+    confusion = px.imshow(
+        curves["confusion_matrix"],
+        text_auto="d",
+        color_continuous_scale="Blues",
+        labels=dict(x="Predicted", y="Actual", color="Faceoffs"),
+        x=["0", "1"],
+        y=["0", "1"],
+    )
+    confusion.update_layout(
+        title="Confusion Matrix", coloraxis_showscale=False, **layout
+    )
+
+    calibration = go.Figure(
+        [
+            go.Scatter(
+                x=curves["calibration"]["prob_pred"],
+                y=curves["calibration"]["prob_true"],
+                mode="lines+markers",
+            ),
+            diagonal,
+        ]
+    )
+    calibration.update_layout(
+        title="Calibration Curve",
+        xaxis_title="Predicted probability",
+        yaxis_title="True probability",
+        **layout,
+    )
+
+    roc = go.Figure(
+        [
+            go.Scatter(x=curves["roc"]["fpr"], y=curves["roc"]["tpr"], mode="lines"),
+            diagonal,
+        ]
+    )
+    roc.update_layout(
+        title=f"ROC Curve (AUC = {auc:.2f})",
+        xaxis_title="False positive rate",
+        yaxis_title="True positive rate",
+        **layout,
+    )
+
+    return {"confusion": confusion, "calibration": calibration, "roc": roc}
+
+
+@st.cache_resource(max_entries=16)
+def load_evaluation_figures(
+    fingerprint: str, _curves: dict, _auc: float
+) -> dict[str, go.Figure]:
+    # Built once per trained model, and only once the charts are asked for
+    mark_cache_miss()
+    return build_evaluation_figures(_curves, _auc)
+
+
+def plot_shap_contributions(contributions: pd.Series, inputs: pd.Series, scale: str):
+    """One prediction's SHAP values, largest first, labelled with the inputs."""
+    shap_df = pd.DataFrame(
+        {
+            "feature": [f"{feature} = {inputs[feature]:g}" for feature in inputs.index],
+            "contribution": contributions.to_numpy(),
+        }
+    )
+    shap_df["effect"] = np.where(
+        shap_df["contribution"] > 0, "Raises chance to win", "Lowers chance to win"
+    )
+    shap_df = shap_df.reindex(shap_df["contribution"].abs().sort_values().index)
+
+    fig = px.bar(
+        shap_df,
+        x="contribution",
+        y="feature",
+        color="effect",
+        orientation="h",
+        color_discrete_map={
+            "Raises chance to win": "#2166ac",
+            "Lowers chance to win": "#b2182b",
+        },
+        labels={"contribution": f"SHAP value ({scale})", "feature": ""},
+    )
+    fig.update_layout(legend_title_text="", margin=dict(l=0, r=0, t=0, b=0))
+
+    return st.plotly_chart(fig, width="stretch")
@@ -0,0 +1,99 @@
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+PROFILE_LOG = "data/logs/profile.jsonl"
+
+# Each Streamlit session runs its script on its own thread, so the run being
+# recorded and its open stages are kept per thread
+_local = threading.local()
+
+
+def _peak_rss_mb() -> float | None:
+    # Process high-water mark; ru_maxrss is in kilobytes on Linux
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def start_run():
+    """Start recording the stages of one script run (e.g. one rerun)."""
+    _local.run = {
+        "run_id": uuid.uuid4().hex[:12],
+        "timestamp": time.time(),
+        "stages": [],
+    }
+    _local.active = []
+    _local.start = time.perf_counter()
+
+
+@contextmanager
+def stage_timer(name: str, cached: bool = False):
+    """Record a stage's wall time, peak memory growth and cache outcome.
+
+    Peak memory is the process high-water mark, so a stage's growth is how far
+    it pushed that mark; most stages add nothing. `cached` stages are a hit
+    unless `mark_cache_miss` is called while they run. Outside a run
+    (see `start_run`) this does nothing but time the block.
+    """
+    run = getattr(_local, "run", None)
+    active = getattr(_local, "active", [])
+    record = {"stage": name, "depth": len(active)}
+    if run is not None:
+        record["offset"] = round(time.perf_counter() - _local.start, 4)
+        run["stages"].append(record)
+
+    active.append(record)
+    peak_before = _peak_rss_mb()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 4)
+        peak_after = _peak_rss_mb()
+        if peak_after is not None:
+            record["peak_rss_mb"] = round(peak_after, 1)
+            record["peak_growth_mb"] = round(peak_after - peak_before, 1)
+        if cached:
+            record["cache"] = "miss" if record.pop("missed", False) else "hit"
+        active.remove(record)
+
+
+def mark_cache_miss():
+    """Called from inside a cached function's body, which only runs on a miss."""
+    active = getattr(_local, "active", [])
+    if active:
+        active[-1]["missed"] = True
+
+
+def finish_run(log_path: str | None = PROFILE_LOG, **context) -> dict | None:
+    """Close the current run, appending it to `log_path` as one JSON line.
+
+    `context` (e.g. the selected team) is recorded alongside the stages.
+    """
+    run = getattr(_local, "run", None)
+    if run is None:
+        return None
+
+    run["context"] = context
+    run["seconds"] = round(time.perf_counter() - _local.start, 4)
+    _local.run = None
+
+    if log_path is not None:
+        # Profiling must never break the app, e.g. on a read-only filesystem
+        try:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            with open(log_path, "a") as f:
+                f.write(json.dumps(run) + "\n")
+        except OSError:
+            pass
+
+    return run
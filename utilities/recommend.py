@@ -0,0 +1,139 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+# Situation grid the recommendation table is precomputed over. Elapsed time is
+# bucketed into 10 minute windows (evaluated at the window's midpoint); every
+# other dimension is exact, with scores covered up to 5 goals a side.
+ELAPSED_BUCKET_SECONDS = 600
+GRID = {
+    "home": [0, 1],
+    "players_diff": [-2, -1, 0, 1, 2],
+    "zone": ["neutral", "offense", "defense"],
+    "score_team": list(range(6)),
+    "score_opponent": list(range(6)),
+    "elapsed_bucket": list(range(7)),  # 0-70 minutes: regulation & overtime
+}
+
+
+def recommendation_key(
+    player_win_rates: pd.Series, opponent_win_rates: pd.Series
+) -> str:
+    """Hash of the roster and opponent rates a table is built for."""
+    digest = hashlib.sha256()
+    for series in [player_win_rates, opponent_win_rates]:
+        digest.update(pd.util.hash_pandas_object(series).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _situation_columns(cells: np.ndarray) -> dict:
+    home, players_diff, zone, score_team, score_opponent, elapsed_bucket = (
+        np.asarray(GRID[dim])[index] for dim, index in zip(GRID, cells)
+    )
+    return {
+        "home": home,
+        "players_diff": players_diff,
+        "zone__offense": (zone == "offense").astype(int),
+        "zone__defense": (zone == "defense").astype(int),
+        "score_team": score_team,
+        "score_diff": score_team - score_opponent,
+        "seconds_elapsed__game": elapsed_bucket * ELAPSED_BUCKET_SECONDS
+        + ELAPSED_BUCKET_SECONDS // 2,
+    }
+
+
+def build_recommendation_table(
+    model,
+    features: list[str],
+    player_win_rates: pd.Series,
+    opponent_win_rates: pd.Series,
+) -> dict:
+    """Precompute every roster player's win probability in every grid cell.
+
+    `player_win_rates` and `opponent_win_rates` are indexed by player id and
+    team code. Probabilities are stored as a float32 array of shape
+    (cells, players), with the players pre-ranked per cell.
+    """
+    situation_shape = tuple(len(values) for values in GRID.values())
+    cells = np.indices(situation_shape).reshape(len(situation_shape), -1)
+    situation = _situation_columns(cells)
+    n_situations, n_players = cells.shape[1], len(player_win_rates)
+
+    columns = {name: np.repeat(values, n_players) for name, values in situation.items()}
+    columns["playerid_team__win_rate"] = np.tile(
+        player_win_rates.to_numpy(), n_situations
+    )
+
+    # One batch per opponent: every situation for every roster player
+    proba = np.empty(
+        (n_situations, len(opponent_win_rates), n_players), dtype=np.float32
+    )
+    for i, opponent_win_rate in enumerate(opponent_win_rates.to_numpy()):
+        columns["opposing_team__win_rate"] = np.full(
+            n_situations * n_players, opponent_win_rate
+        )
+        X = np.stack(
+            [columns[feature] for feature in features], axis=1, dtype=np.float32
+        )
+        proba[:, i] = model.predict_proba(X)[:, 1].reshape(n_situations, n_players)
+    proba = proba.reshape(-1, n_players)
+
+    return {
+        "shape": situation_shape + (len(opponent_win_rates),),
+        "opponent_index": {
+            opponent: i for i, opponent in enumerate(opponent_win_rates.index)
+        },
+        "player_ids": player_win_rates.index.to_numpy(),
+        "proba": proba,
+        "ranking": np.argsort(-proba, axis=1, kind="stable").astype(np.int16),
+    }
+
+
+def situation_cell(table: dict, situation: dict) -> int | None:
+    """Flat cell index for a situation, or None if it falls off the grid."""
+    if situation["zone__offense"] and situation["zone__defense"]:
+        return None
+    zone = (
+        "offense"
+        if situation["zone__offense"]
+        else "defense" if situation["zone__defense"] else "neutral"
+    )
+    values = [
+        int(situation["home"]),
+        situation["players_diff"],
+        zone,
+        situation["score_team"],
+        situation["score_team"] - situation["score_diff"],
+        situation["seconds_elapsed__game"] // ELAPSED_BUCKET_SECONDS,
+    ]
+
+    index = []
+    for dim, value in zip(GRID, values):
+        if value not in GRID[dim]:
+            return None
+        index.append(GRID[dim].index(value))
+
+    if situation["opponent"] not in table["opponent_index"]:
+        return None
+    index.append(table["opponent_index"][situation["opponent"]])
+
+    return int(np.ravel_multi_index(index, table["shape"]))
+
+
+def lookup_recommendation(table: dict, situation: dict) -> pd.DataFrame | None:
+    """Ranked win probabilities for a situation, without calling the model.
+
+    Returns None for off-grid situations so the caller can predict exactly.
+    """
+    cell = situation_cell(table, situation)
+    if cell is None:
+        return None
+
+    ranking = table["ranking"][cell]
+    return pd.DataFrame(
+        {
+            "playerid_team": table["player_ids"][ranking],
+            "Chance to Win": table["proba"][cell, ranking],
+        }
+    )
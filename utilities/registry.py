@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+
+from utilities.cache import temp_path
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+MODEL_DIR = "data/models"
+
+# Room for one model per team (see `core.pipeline`) plus tuning runs
+MAX_MODELS = 48
+
+# Index & lineage updates are read-modify-writes, made one at a time across
+# this process's threads (sessions, background jobs) and across processes
+_index_lock = threading.Lock()
+
+
+@contextmanager
+def _locked(model_dir: str):
+    with _index_lock:
+        os.makedirs(model_dir, exist_ok=True)
+        with open(os.path.join(model_dir, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def model_fingerprint(
+    X: np.ndarray, y: np.ndarray, features: list[str], params: dict
+) -> str:
+    """Hash of the training data, feature list and hyperparameters."""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(X))
+    digest.update(np.ascontiguousarray(y))
+    digest.update(
+        json.dumps(
+            [features, params, X.shape, str(X.dtype), str(y.dtype)],
+            sort_keys=True,
+            default=str,
+        ).encode()
+    )
+    return digest.hexdigest()[:16]
+
+
+def lineage_key(scope: list, features: list[str], params: dict) -> str:
+    """Hash of what a model is trained for, whatever data it was trained on.
+
+    `scope` names the training set (e.g. the team & filters), so successive
+    models of one lineage differ only by the games added since.
+    """
+    return hashlib.sha256(
+        json.dumps([scope, features, params], sort_keys=True, default=str).encode()
+    ).hexdigest()[:16]
+
+
+def _index_path(model_dir: str) -> str:
+    return os.path.join(model_dir, "index.json")
+
+
+def _read_index(model_dir: str) -> dict:
+    try:
+        with open(_index_path(model_dir)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_index(index: dict, model_dir: str, path: str | None = None):
+    path = path or _index_path(model_dir)
+    tmp_path = temp_path(os.path.dirname(path))
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _lineages_path(model_dir: str) -> str:
+    return os.path.join(model_dir, "lineages.json")
+
+
+def _read_lineages(model_dir: str) -> dict:
+    # Lineage key -> fingerprint of its latest model
+    try:
+        with open(_lineages_path(model_dir)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _model_path(fingerprint: str, model_dir: str) -> str:
+    return os.path.join(model_dir, f"{fingerprint}.joblib")
+
+
+def has_model(fingerprint: str, model_dir: str = MODEL_DIR) -> bool:
+    return os.path.exists(_model_path(fingerprint, model_dir))
+
+
+def load_model(fingerprint: str, model_dir: str = MODEL_DIR) -> dict | None:
+    """Load a registered model entry, marking it as most recently used."""
+    path = _model_path(fingerprint, model_dir)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        entry = joblib.load(path)
+    except FileNotFoundError:
+        # Evicted by another writer since the check above
+        return None
+
+    with _locked(model_dir):
+        index = _read_index(model_dir)
+        index[fingerprint] = time.time()
+        _write_index(index, model_dir)
+
+    return entry
+
+
+def latest_model(lineage: str, model_dir: str = MODEL_DIR) -> dict | None:
+    """The most recently saved entry of a lineage, if still registered."""
+    fingerprint = _read_lineages(model_dir).get(lineage)
+    if fingerprint is None:
+        return None
+    return load_model(fingerprint, model_dir)
+
+
+def save_model(
+    fingerprint: str,
+    entry: dict,
+    model_dir: str = MODEL_DIR,
+    lineage: str | None = None,
+):
+    """Persist a model entry and evict the least recently used beyond MAX_MODELS.
+
+    The entry becomes the latest of `lineage`, if given (see `latest_model`).
+    """
+    tmp_path = temp_path(model_dir)
+    joblib.dump(entry, tmp_path)
+    os.replace(tmp_path, _model_path(fingerprint, model_dir))
+
+    with _locked(model_dir):
+        index = _read_index(model_dir)
+        index[fingerprint] = time.time()
+
+        # Model files missing from the index (e.g. written before it was
+        # locked) are evicted by age too, rather than kept forever
+        for name in os.listdir(model_dir):
+            stem, extension = os.path.splitext(name)
+            if extension == ".joblib" and stem not in index:
+                index[stem] = os.path.getmtime(os.path.join(model_dir, name))
+
+        for stale in sorted(index, key=index.get)[:-MAX_MODELS]:
+            if os.path.exists(_model_path(stale, model_dir)):
+                os.remove(_model_path(stale, model_dir))
+            del index[stale]
+        _write_index(index, model_dir)
+
+        if lineage is not None:
+            lineages = _read_lineages(model_dir)
+            lineages[lineage] = fingerprint
+            _write_index(lineages, model_dir, path=_lineages_path(model_dir))
+
+
+def load_or_train(
+    fingerprint: str,
+    train,
+    model_dir: str = MODEL_DIR,
+    lineage: str | None = None,
+    update=None,
+) -> dict:
+    """Return the registered entry for `fingerprint`, training it on a miss.
+
+    `train` is a zero-argument callable returning the entry to register. On a
+    miss where `lineage` has an earlier entry, `update(entry)` is called
+    instead, to build the new entry from it (e.g. with only the new games).
+    """
+    entry = load_model(fingerprint, model_dir)
+    if entry is None:
+        base = None if update is None else latest_model(lineage, model_dir)
+        entry = train() if base is None else update(base)
+        save_model(fingerprint, entry, model_dir, lineage=lineage)
+    return entry
+
+
+def _sweep_path(data_key: str, model_dir: str) -> str:
+    return os.path.join(model_dir, "sweeps", f"{data_key}.json")
+
+
+def load_sweep_scores(data_key: str, model_dir: str = MODEL_DIR) -> dict:
+    """Cross-validation scores recorded for a training set, keyed by config."""
+    try:
+        with open(_sweep_path(data_key, model_dir)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_sweep_scores(data_key: str, scores: dict, model_dir: str = MODEL_DIR):
+    tmp_path = temp_path(os.path.dirname(_sweep_path(data_key, model_dir)))
+    with open(tmp_path, "w") as f:
+        json.dump(scores, f, indent=2)
+    os.replace(tmp_path, _sweep_path(data_key, model_dir))
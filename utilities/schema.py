@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+# Compact dtypes for the cleaned faceoff & player frames, applied in one place
+# at the end of cleaning. Columns not listed here keep their dtype.
+INT_COLUMNS = {
+    "int8": [
+        "home",
+        "score_team",
+        "score_opponent",
+        "score_diff",
+        "players_team",
+        "players_opponent",
+        "players_diff",
+        "power_play",
+        "short_handed",
+        "empty_net",
+        "extra_attacker",
+        "period",
+        "overtime",
+        "win",
+        "shoots_same",
+        "score__trailing",
+        "score__leading",
+        "zone__offense",
+        "zone__defense",
+    ],
+    "int16": [
+        "gameID",
+        "season",
+        "seconds_remaining__period",
+        "seconds_remaining__game",
+        "seconds_elapsed__period",
+        "seconds_elapsed__game",
+        "x",
+        "y",
+    ],
+    "int32": [
+        "playerid",
+        "playerid_team",
+        "playerid_opponent",
+        "winner_playerid",
+        "playerid_team__faceoffs",
+        "playerid_team__wins",
+    ],
+}
+
+FLOAT_COLUMNS = [
+    "height",
+    "weight",
+    "height_diff",
+    "weight_diff",
+    "playerid_team__win_rate",
+    "opposing_team__win_rate",
+]
+
+# Columns in a group share one set of categories, so they can be compared
+# with each other (e.g. team == winner_team)
+CATEGORY_GROUPS = [
+    ["team", "opponent", "winner_team"],
+    ["zone"],
+    ["score_state"],
+    ["shoots", "shoots_team", "shoots_opponent"],
+]
+
+
+def _category_dtype(df: pd.DataFrame, columns: list[str]) -> pd.CategoricalDtype:
+    # Sorted categories keep groupby & sort order the same as for strings
+    values = set()
+    for col in columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            values |= set(df[col].cat.categories)
+        else:
+            values |= set(df[col].dropna().unique())
+    return pd.CategoricalDtype(sorted(values))
+
+
+def enforce_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Cast the frame's known columns to their schema dtypes.
+
+    Raises a ValueError if an integer column holds missing values or values
+    outside the range of its dtype, rather than silently wrapping them.
+    """
+    dtypes = {}
+
+    for dtype, columns in INT_COLUMNS.items():
+        info = np.iinfo(dtype)
+        for col in columns:
+            if col not in df.columns or df[col].dtype == dtype:
+                continue
+            if df[col].isna().any():
+                raise ValueError(f"Column '{col}' has missing values")
+            if len(df) > 0 and (df[col].min() < info.min or df[col].max() > info.max):
+                raise ValueError(f"Column '{col}' does not fit in {dtype}")
+            dtypes[col] = dtype
+
+    for col in FLOAT_COLUMNS:
+        if col in df.columns and df[col].dtype != "float32":
+            dtypes[col] = "float32"
+
+    for group in CATEGORY_GROUPS:
+        columns = [col for col in group if col in df.columns]
+        if columns == []:
+            continue
+        category_dtype = _category_dtype(df, columns)
+        for col in columns:
+            if df[col].dtype != category_dtype:
+                dtypes[col] = category_dtype
+
+    return df.astype(dtypes) if dtypes else df
+
+
+def memory_per_row(df: pd.DataFrame) -> float:
+    """Bytes per row, counting the contents of object columns."""
+    return df.memory_usage(deep=True).sum() / max(len(df), 1)
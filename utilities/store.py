@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utilities.cache import file_sha256, temp_path
+
+STORE_DIR = "data/store"
+
+# Faceoffs live in one directory per season; every ingest writes one file per
+# season (per chunk of rows read) holding only the games that were new to the
+# store, and the manifest records which games (and teams) each file holds.
+#
+#   data/store/
+#       manifest.json
+#       players.parquet          (cleaned)
+#       players_raw.parquet      (as ingested, re-cleaned as a whole)
+#       faceoffs/season=2024/games-0001-0045.parquet
+
+
+def _manifest_path(store_dir: str) -> str:
+    return os.path.join(store_dir, "manifest.json")
+
+
+def read_manifest(store_dir: str = STORE_DIR) -> dict:
+    try:
+        with open(_manifest_path(store_dir)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": None, "sources": {}, "partitions": [], "players": None}
+
+
+def _write_manifest(manifest: dict, store_dir: str):
+    # The version changes whenever the set of stored files does
+    contents = json.dumps(
+        [manifest["partitions"], manifest["players"]], sort_keys=True
+    ).encode()
+    manifest["version"] = hashlib.sha256(contents).hexdigest()[:16]
+
+    tmp_path = temp_path(store_dir)
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, _manifest_path(store_dir))
+
+
+def store_version(store_dir: str = STORE_DIR) -> str | None:
+    return read_manifest(store_dir)["version"]
+
+
+def stored_games(manifest: dict) -> set[tuple[int, int]]:
+    return {
+        (partition["season"], game)
+        for partition in manifest["partitions"]
+        for game in partition["games"]
+    }
+
+
+def _write_parquet(df: pd.DataFrame, path: str):
+    tmp_path = temp_path(os.path.dirname(path))
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def append_faceoff_chunks(
+    chunks: Iterable[pd.DataFrame],
+    store_dir: str = STORE_DIR,
+    source: dict | None = None,
+) -> list[str]:
+    """Append cleaned league faceoffs to the store one chunk at a time.
+
+    Each chunk is written as soon as it arrives, so only one is ever held in
+    memory. Games stored before this call are skipped; a new game split
+    across chunks is written in full. The manifest is only updated once every
+    chunk is written, so an interrupted ingest leaves the store as it was.
+    """
+    manifest = read_manifest(store_dir)
+    known_games = list(stored_games(manifest))
+
+    written = []
+    for league_df in chunks:
+        game_keys = pd.MultiIndex.from_arrays(
+            [league_df["season"], league_df["gameID"]]
+        )
+        new_df = league_df[~game_keys.isin(known_games)]
+
+        for season, season_df in new_df.groupby("season", sort=True):
+            games = sorted(season_df["gameID"].unique().tolist())
+            stem = os.path.join(
+                "faceoffs",
+                f"season={season}",
+                f"games-{games[0]:04d}-{games[-1]:04d}",
+            )
+
+            # Never overwrite: a later batch spanning the same game range gets a suffix
+            relpath, batch = f"{stem}.parquet", 1
+            while os.path.exists(os.path.join(store_dir, relpath)):
+                relpath, batch = f"{stem}__{batch}.parquet", batch + 1
+
+            _write_parquet(season_df, os.path.join(store_dir, relpath))
+            manifest["partitions"].append(
+                {
+                    "path": relpath,
+                    "season": int(season),
+                    "games": games,
+                    "teams": sorted(
+                        set(season_df["HomeTeam"].dropna())
+                        | set(season_df["AwayTeam"].dropna())
+                    ),
+                    "rows": len(season_df),
+                }
+            )
+            written.append(relpath)
+
+    if source is not None:
+        manifest["sources"][source["path"]] = source["version"]
+    if written or source is not None:
+        _write_manifest(manifest, store_dir)
+
+    return written
+
+
+def write_players(
+    players_raw: pd.DataFrame, players_clean: pd.DataFrame, store_dir: str = STORE_DIR
+):
+    manifest = read_manifest(store_dir)
+    _write_parquet(players_raw, os.path.join(store_dir, "players_raw.parquet"))
+    _write_parquet(players_clean, os.path.join(store_dir, "players.parquet"))
+    manifest["players"] = {
+        "rows": len(players_clean),
+        "sha256": file_sha256(os.path.join(store_dir, "players.parquet")),
+    }
+    _write_manifest(manifest, store_dir)
+
+
+def read_raw_players(store_dir: str = STORE_DIR) -> pd.DataFrame | None:
+    path = os.path.join(store_dir, "players_raw.parquet")
+    return pd.read_parquet(path) if os.path.exists(path) else None
+
+
+def read_store(
+    store_dir: str = STORE_DIR,
+    seasons: list[int] | None = None,
+    teams: list[str] | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Read cleaned league faceoffs and players from the store.
+
+    Only partitions holding the requested seasons/teams are opened; the
+    manifest answers which ones without touching the files.
+    """
+    manifest = read_manifest(store_dir)
+
+    # Seasons stay contiguous however many chunks they were ingested in
+    partitions = sorted(
+        (
+            partition
+            for partition in manifest["partitions"]
+            if (seasons is None or partition["season"] in seasons)
+            and (teams is None or set(partition["teams"]) & set(teams))
+        ),
+        key=lambda partition: partition["season"],
+    )
+    tables = [
+        pq.read_table(os.path.join(store_dir, partition["path"]), memory_map=True)
+        for partition in partitions
+    ]
+    if tables:
+        faceoffs_df = pa.concat_tables(tables, promote_options="permissive").to_pandas()
+    else:
+        faceoffs_df = pd.DataFrame()
+
+    if teams is not None and len(faceoffs_df) > 0:
+        faceoffs_df = faceoffs_df[
+            faceoffs_df["HomeTeam"].isin(teams) | faceoffs_df["AwayTeam"].isin(teams)
+        ].reset_index(drop=True)
+
+    player_df = pd.read_parquet(os.path.join(store_dir, "players.parquet"))
+
+    return faceoffs_df, player_df